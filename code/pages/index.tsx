@@ -24,8 +24,28 @@ type Analysis = {
     result: ResultStructured;
     signal: string;
   };
+  // Paginated endpoints for the data a lean response leaves out
+  links?: { transcript: string; chunks: string };
 };
 
+// Type definition for one page of speaker turns from /transcripts/<quarter>
+type TranscriptPage = {
+  next_offset: number | null;
+  items: { speaker: string | null; role: string | null; text: string }[];
+};
+
+// Type definition for a job progress snapshot streamed from the backend
+type Progress = {
+  status: string;
+  message: string;
+  totals: { chunks_done: number; chunks_total: number; cache_hits: number; llm_calls: number };
+  // Streamed text per node: `partials` are still generating, `completed` finished since the previous event
+  quarters: Record<string, { stage: string | null; partials: Record<string, string>; completed: Record<string, string> }>;
+};
+
+// Chunk-level nodes are named <section>_<index>, e.g. management_sentiment_0
+const CHUNK_NODE = /^(management_sentiment|qa_sentiment)_(\d+)$/;
+
 // Determine backend API base URL depending on client environment
 const BASE_URL =
   typeof window !== "undefined" && window.location.hostname === "localhost"
@@ -41,23 +61,70 @@ export default function IndexPage(){
   const [activeTab, setActiveTab] = useState("transcripts");
   // Tracks which sub-tab of the transcript page is active
   const [transcriptsSubTab, setTranscriptsSubTab] = useState<"summary" | "full">("summary");
+  // Latest progress snapshot for the running analysis job
+  const [progress, setProgress] = useState<Progress | null>(null);
+  // Streamed text per quarter and node, accumulated from progress events (which only carry what changed)
+  const [insights, setInsights] = useState<Record<string, Record<string, string>>>({});
+  // Full transcript text per quarter, loaded only when the Full Text tab is opened
+  const [transcripts, setTranscripts] = useState<Record<string, string>>({});
 
   useEffect(() => {
-    // Fetch data for the last four quarters' earnings analysis
-    fetch(`${BASE_URL}/analyze/last-four`)
-      .then(res => res.json())
-      .then(json => setData(json.results));
-
-    // Fetch tone shift comparisons between quarters
-    fetch(`${BASE_URL}/analyze/tone-shift`)
-      .then(res => res.json())
-      .then(json => setToneShifts(json.comparisons));
-    
+    let source: EventSource | null = null;
+
+    // Submit (or attach to) a background analysis job, then follow its progress stream until it finishes
+    const runJob = async () => {
+      const submitted = await fetch(`${BASE_URL}/jobs`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ company: "NVIDIA" }),
+      }).then(res => res.json());
+
+      source = new EventSource(`${BASE_URL}/progress/${submitted.job_id}/stream`);
+      source.onmessage = async (event) => {
+        const snapshot: Progress = JSON.parse(event.data);
+        setProgress(snapshot);
+        setInsights(prev => {
+          const next = { ...prev };
+          Object.entries(snapshot.quarters).forEach(([quarter, q]) => {
+            next[quarter] = { ...next[quarter], ...q.completed, ...q.partials };
+          });
+          return next;
+        });
+        if(snapshot.status !== "done" && snapshot.status !== "failed") return;
+        source?.close();
+        if(snapshot.status === "failed") return;
+
+        // One job result carries both the per-quarter analysis and the tone shift comparisons;
+        // the lean view leaves full transcripts out so the first load stays small
+        const json = await fetch(`${BASE_URL}/jobs/${submitted.job_id}/result?view=lean`).then(res => res.json());
+        setData(json.results);
+        setToneShifts(json.tone_shift.comparisons);
+      };
+    };
+    runJob();
+
     // Debugging logs
     console.log("Active Tab:", activeTab);
     console.log("Sub Tab:", transcriptsSubTab);
+
+    return () => { source?.close(); };
   },[]);
 
+  // Fetch each quarter's transcript page by page the first time the Full Text tab is shown
+  useEffect(() => {
+    if(transcriptsSubTab !== "full") return;
+    data.filter(item => item.links && !(item.quarter in transcripts)).forEach(async (item) => {
+      const turns: string[] = [];
+      let offset: number | null = 0;
+      while(offset !== null){
+        const page: TranscriptPage = await fetch(`${BASE_URL}${item.links!.transcript}?offset=${offset}&limit=500`).then(res => res.json());
+        page.items.forEach(turn => turns.push([turn.speaker && (turn.role ? `${turn.speaker} -- ${turn.role}` : turn.speaker), turn.text].filter(Boolean).join("\n")));
+        offset = page.next_offset;
+      }
+      setTranscripts(prev => ({ ...prev, [item.quarter]: turns.join("\n\n") }));
+    });
+  }, [transcriptsSubTab, data]);
+
   // Renders content based on the current active tab and sub-tab
   const renderContent = () => {
     console.log("Active Tab:", activeTab);
@@ -72,7 +139,7 @@ export default function IndexPage(){
               <pre className="whitespace-pre-wrap mt-2">
                 {transcriptsSubTab === "summary"
                   ? item.analysis.result.summary
-                  : item.analysis.result.transcript || "Full transcript not available."}
+                  : transcripts[item.quarter] || item.analysis.result.transcript || (item.links ? "Loading full transcript..." : "Full transcript not available.")}
               </pre>
             </div>
           ))}
@@ -176,6 +243,25 @@ export default function IndexPage(){
       {/* Main Content Section */}
       <main className="flex-1 p-8 overflow-y-auto">
         <h1 className="text-3xl font-bold mb-6 text-gray-800">NVIDIA Earnings Call Analysis</h1>
+        {progress && progress.status !== "done" && (
+          <p className="mb-4 text-sm text-gray-600">
+            {progress.message} ({progress.totals.chunks_done}/{progress.totals.chunks_total} chunks, {progress.totals.cache_hits} cached, {progress.totals.llm_calls} LLM calls)
+          </p>
+        )}
+        {/* Chunk analyses and overall summaries streamed as they are generated, while the rest of the job is still running */}
+        {progress && progress.status !== "done" && Object.entries(insights)
+          .filter(([, nodes]) => Object.keys(nodes).some(name => name === "summary" || CHUNK_NODE.test(name)))
+          .map(([quarter, nodes]) => (
+            <div key={quarter} className="mb-4 p-4 border rounded bg-white shadow opacity-80">
+              <h2 className="text-xl font-bold">{quarter} – preliminary insights</h2>
+              {nodes.summary && <pre className="whitespace-pre-wrap mt-2">{nodes.summary}</pre>}
+              <ul className="list-disc ml-6 mt-2 text-sm">
+                {Object.entries(nodes)
+                  .filter(([name]) => CHUNK_NODE.test(name))
+                  .map(([name, text]) => <li key={name} className="whitespace-pre-wrap mt-1">{text}</li>)}
+              </ul>
+            </div>
+          ))}
         {renderContent()}
       </main>
     </div>
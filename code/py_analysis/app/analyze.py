@@ -2,127 +2,250 @@ import os
 import re
 import json
 import time
-from pathlib import Path
 import requests
 from dotenv import load_dotenv
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List
+from app.cache import ResponseCache, make_cache_key
+from app.dedup import CHUNK_DEDUP, DEDUP_KEEP_FRACTION, DEDUP_NOVELTY_WEIGHT, DEDUP_THRESHOLD, DEDUP_VERSION, select_representatives
+from app.embeddings import EmbeddingStore, get_embedder
+from app.chunking import CHUNK_OVERLAP_TOKENS, DEFAULT_CHARS_PER_TOKEN, approx_tokens, chars_per_token, chunk_token_budget, chunk_transcript
+from app.metrics import LLM_REQUESTS, observe_span, record_generation, span, timed
+from app.pipeline import StageRun, StageStore, fingerprint
+from app.ollama_client import OllamaClient, OllamaError
+from app.progress import ProgressTracker, progress_registry
+from app.routing import ModelGate, resolve_routes
+from app.scoring import SCORER_VERSION, get_scorer
+from app.signals import SIGNAL_FORMAT_INSTRUCTIONS, STRUCTURED_OUTPUT, SignalStore, parse_signal, present, present_partial, render_signal
+from app.summaries import RESPONSE_SEPARATOR_TOKENS, SUMMARY_MAX_DEPTH, SUMMARY_REDUCE, SummaryStore, fit_response, plan_reduce_batches, summary_batch_budget
 
 # Load environment variables from .env file
 load_dotenv()
 
 # API and configuration constants
-OLLAMA_URL = "http://localhost:11434/api/generate"
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "mixtral")
-CACHE_DIR = f"cache_{OLLAMA_MODEL}"
-PROGRESS_PATH = "progress.json"
-
-# Ensure cache directory exists
-os.makedirs(CACHE_DIR, exist_ok=True)
-
-# Write progress messages to disk for frontend polling
-def update_progress(message: str):
-    with open(PROGRESS_PATH, "w", encoding="utf-8") as f:
-        json.dump({"status": message, "timestamp": time.time()}, f)
-        print(message)
-
-# Generate a safe cache path based on input parameters
-def _cache_path(prompt: str, company: str, quarter: str, section_index: int = None, is_summary: int = 0, custom_suffix: str = None) -> Path:
+OLLAMA_OPTIONS = json.loads(os.getenv("OLLAMA_OPTIONS", "{}"))
+for _option, _env, _cast in (("num_ctx", "OLLAMA_NUM_CTX", int), ("num_predict", "OLLAMA_NUM_PREDICT", int), ("temperature", "OLLAMA_TEMPERATURE", float)):
+    if os.getenv(_env):
+        OLLAMA_OPTIONS[_option] = _cast(os.getenv(_env))
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", "0"))
+CACHE_MAX_AGE_DAYS = float(os.getenv("CACHE_MAX_AGE_DAYS", "0"))
+OLLAMA_STREAM = os.getenv("OLLAMA_STREAM", "false").lower() in ("1", "true", "yes")
+STREAM_PARTIAL_INTERVAL = float(os.getenv("STREAM_PARTIAL_INTERVAL", "0.25"))
+OLLAMA_NUM_PARALLEL = max(1, int(os.getenv("OLLAMA_NUM_PARALLEL", "4")))
+
+# Bump a template's version to invalidate its cached responses without editing the prompt text
+PROMPT_VERSIONS = {
+    "management_chunk": "1",
+    "qa_chunk": "1",
+    "section_summary": "1",
+    "section_reduce": "1",
+    "overall_summary": "1",
+    "tone_compare": "1",
+}
+
+# Templates whose prompts ask for JSON signals when STRUCTURED_OUTPUT is on (reduce notes stay free text)
+STRUCTURED_TEMPLATES = {"management_chunk", "qa_chunk", "section_summary", "overall_summary"}
+
+# Shared response cache: one SQLite index instead of a JSON file per prompt
+response_cache = ResponseCache(
+    os.path.join(CACHE_DIR, "llm_cache.sqlite3"),
+    max_bytes=int(CACHE_MAX_MB * 1024 * 1024) or None,
+    max_age_seconds=CACHE_MAX_AGE_DAYS * 86400 or None
+)
+
+# Input fingerprints and outputs of every stage node, used to recompute only what changed
+stage_store = StageStore(os.path.join(CACHE_DIR, "stages.sqlite3"))
+
+# Chunk embeddings for near-duplicate detection, keyed by embedder and text hash
+embedding_store = EmbeddingStore(os.path.join(CACHE_DIR, "embeddings.sqlite3"))
+
+# Parsed sentiment, tone, themes and concerns per company/quarter/section, for trend and tone-shift queries
+signal_store = SignalStore(os.path.join(CACHE_DIR, "signals.sqlite3"))
+
+# Overall summary per company/quarter/model, kept in memory for tone comparisons
+summary_store = SummaryStore()
+
+# Pooled client with timeouts, retries and a circuit breaker; every generation goes through it
+ollama_client = OllamaClient(OLLAMA_URL, pool_size=OLLAMA_NUM_PARALLEL)
+
+# Lets one model's calls (OLLAMA_MAX_LOADED_MODELS) run at a time so stages routed to different models do not
+# make Ollama swap models back and forth
+model_gate = ModelGate()
+
+# Bounded worker pool shared by every analysis; size it to match Ollama's own OLLAMA_NUM_PARALLEL
+llm_pool = ThreadPoolExecutor(max_workers=OLLAMA_NUM_PARALLEL, thread_name_prefix="ollama")
+
+# Resize the shared LLM pool, e.g. when a batch run sets its own global concurrency budget
+def configure_llm_pool(workers: int):
+    global llm_pool
+    previous, llm_pool = llm_pool, ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ollama")
+    ollama_client.resize_pool(max(1, workers))
+    previous.shutdown(wait=False)
+
+# Record a progress message on the job's tracker (if any) and the global status line
+def update_progress(message: str, progress: ProgressTracker = None):
+    if progress is not None:
+        progress.set_message(message)
+    progress_registry.set_status(message)
+    print(message)
+
+# Normalize company and quarter into the labels stored alongside cache entries
+def _cache_label(company: str, quarter: str) -> tuple:
     sanitized_company = re.sub(r'\W+', '', company.lower())
     sanitized_quarter = re.sub(r'\W+', '', quarter.upper())
-
-    if custom_suffix:
-        filename = f"{sanitized_company}_{sanitized_quarter}_{custom_suffix}.json"
-    elif is_summary == 1:
-        filename = f"{sanitized_company}_{sanitized_quarter}_summary.json"
-    elif is_summary == 2:
-        filename = f"{sanitized_company}_{sanitized_quarter}_tone.json"
-    else:
-        filename = f"{sanitized_company}_{sanitized_quarter}_{section_index}.json"
-
-    return Path(CACHE_DIR) / filename
-
-# Return cached result if available, otherwise call Ollama API
-def _cached_or_call(prompt: str, path: Path) -> str:
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)["content"]
-
-    update_progress("Calling Mistral via Ollama...")
-
-    response = requests.post(OLLAMA_URL, json={
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": False
-    })
-    response.raise_for_status()
+    return sanitized_company, sanitized_quarter
+
+# Ollama output format for a template: "json" for structured templates, otherwise free text
+def _response_format(template: str) -> str | None:
+    return "json" if STRUCTURED_OUTPUT and template in STRUCTURED_TEMPLATES else None
+
+# Append the JSON signal schema to a prompt rendered from a structured template
+def _structured(prompt: str, template: str) -> str:
+    return prompt + _format_suffix(template)
+
+def _format_suffix(template: str) -> str:
+    return SIGNAL_FORMAT_INSTRUCTIONS if _response_format(template) else ""
+
+# Build the content-addressed cache key for a prompt rendered from the given template
+def _cache_key(prompt: str, template: str, model: str = None, options: dict = None) -> str:
+    fmt = _response_format(template)
+    return make_cache_key(
+        model or OLLAMA_MODEL,
+        prompt,
+        template_version=f"{template}:{PROMPT_VERSIONS.get(template, '0')}" + (f":{fmt}" if fmt else ""),
+        options=OLLAMA_OPTIONS if options is None else options
+    )
+
+# Return cached result if available, otherwise call Ollama (streaming tokens when enabled)
+def _cached_or_call(prompt: str, template: str, company: str, quarter: str, name: str, model: str = None, progress: ProgressTracker = None, on_partial: Callable[[str, str, str], None] = None, stream: bool = None, options: dict = None) -> str:
+    model = model or OLLAMA_MODEL
+    options = OLLAMA_OPTIONS if options is None else options
+    key = _cache_key(prompt, template, model, options)
+    started = time.perf_counter()
+    cached = response_cache.get(key)
+    # Tone comparisons are labelled with a quarter pair, which the tracker keeps apart from real quarters
+    scope = "comparisons" if template == "tone_compare" else "quarters"
+    if progress is not None:
+        progress.record_call(quarter, cached is not None, scope)
+    LLM_REQUESTS.inc(template=template, result="hit" if cached is not None else "miss")
+    if cached is not None:
+        observe_span("llm_cache_hit", time.perf_counter() - started, progress)
+        return cached
+
+    update_progress(f"Calling {model} via Ollama...", progress)
+    gate_started = time.perf_counter()
+
+    # JSON responses are published as readable text, never as raw JSON
+    response_format = _response_format(template)
+
+    def forward(text: str):
+        if response_format is not None:
+            text = present_partial(text)
+        if progress is not None:
+            progress.set_partial(quarter, name, text, scope)
+        if on_partial is not None:
+            on_partial(quarter, name, text)
 
     try:
-        content = response.json().get("response") or response.json().get("message", {}).get("content") or ""
-    except Exception as e:
-        print("Failed to parse Ollama response:", e)
-        content = ""
-
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump({"content": content}, f, indent=2)
+        with model_gate.hold(model):
+            observe_span("model_wait", time.perf_counter() - gate_started, progress)
+            result = ollama_client.generate(
+                model,
+                prompt,
+                options=options,
+                stream=OLLAMA_STREAM if stream is None else stream,
+                on_partial=forward,
+                partial_interval=STREAM_PARTIAL_INTERVAL,
+                format=response_format
+            )
+    except Exception:
+        if progress is not None:
+            progress.end_partial(quarter, name, None, scope)
+        raise
+    content = result["response"]
+    record_generation(model, result, progress)
+    if progress is not None:
+        progress.end_partial(quarter, name, present(content) if response_format is not None else content, scope)
+
+    sanitized_company, sanitized_quarter = _cache_label(company, quarter)
+    response_cache.put(key, content, model, sanitized_company, sanitized_quarter, name)
+    observe_span("llm_call", time.perf_counter() - started, progress)
 
     return content
 
+# Model and options per stage for a run: `models` (stage -> model) and OLLAMA_MODEL_<STAGE> override `model`
+def routes_for(model: str = None, models: dict = None) -> dict:
+    return resolve_routes(model or OLLAMA_MODEL, OLLAMA_OPTIONS, models)
+
+# Look up the most recent stored response for a company/quarter label without calling the model
+def get_cached_result(company: str, quarter: str, name: str, model: str = None) -> str | None:
+    sanitized_company, sanitized_quarter = _cache_label(company, quarter)
+    return response_cache.lookup(sanitized_company, sanitized_quarter, name, model or OLLAMA_MODEL)
+
+# Overall summary for a quarter: the in-process store first, then the response cache (e.g. after a restart)
+def get_quarter_summary(company: str, quarter: str, model: str = None) -> str | None:
+    model = model or OLLAMA_MODEL
+    summary = summary_store.get(company, quarter, model)
+    if summary is None:
+        summary = get_cached_result(company, quarter, "summary", model)
+        if summary is not None:
+            summary = present(summary, _response_format("overall_summary") is not None)
+            summary_store.put(company, quarter, model, summary)
+    return summary
+
+# Per-chunk details (score, reason, chunk analysis and text) recorded by the last run of a quarter's stage graph
+def get_chunk_details(company: str, quarter: str) -> dict:
+    records = stage_store.load(*_cache_label(company, quarter))
+    selection = records["dedup"][1] if "dedup" in records else None
+    details = {}
+    for label in ("management_sentiment", "qa_sentiment"):
+        chunks = records.get(f"chunks:{label}")
+        if chunks is None:
+            continue
+        details[label] = []
+        for i, item in enumerate(chunks[1]):
+            name = f"{label}_{i}"
+            # Chunks folded into a near-duplicate show the analysis of the chunk that represented them
+            represented_by = selection["representative"].get(name, name) if selection else name
+            entry = {
+                "index": i,
+                "score": item["score"],
+                "reason": item["reason"],
+                "summary": present(records[represented_by][1], _response_format("management_chunk") is not None) if represented_by in records else None,
+                "chunk": item["chunk"],
+            }
+            if represented_by != name:
+                entry["represented_by"] = represented_by
+            details[label].append(entry)
+    return details
+
 # Remove boilerplate ad segments and normalize spacing
 def preprocess_transcript(text: str) -> str:
     cleaned = re.sub(r"You're reading a free article.*?Learn More", "", text, flags=re.DOTALL)
     cleaned = re.sub(r"\n{2,}", "\n", cleaned).strip()
     return cleaned
 
-# Split large transcript text into manageable chunks
+# Split large transcript text into manageable chunks (character budget kept for older callers)
+@timed("chunking")
 def split_long_text(text: str, max_len: int = 4000, min_len: int = 0) -> list:
-    if len(text) <= max_len:
-        return [text.strip()]
-
-    parts = re.split(r"\n(?=\S)", text)
-    chunks, current = [], ""
-
-    for part in parts:
-        if len(current) + len(part) < max_len:
-            current += part + "\n"
-        else:
-            if len(current.strip()) >= min_len:
-                chunks.append(current.strip())
-            current = part + "\n"
-
-    if len(current.strip()) >= min_len:
-        chunks.append(current.strip())
-
-    return chunks
-
-# Analyze sentiment and strategy from labeled transcript sections
-def analyze_labeled_sections(prepared: str, qa: str, company: str = "NVIDIA", quarter: str = "QX", provider: str = "ollama") -> dict:
-    update_progress("Preprocessing labeled sections")
-
-    final_analysis = {
-        "company": company,
-        "provider": provider,
-        "model": OLLAMA_MODEL,
-        "signal": "labeled_analysis",
-        "result": {}
-    }
-
-    labeled_inputs = {
-        "management_sentiment": split_long_text(prepared),
-        "qa_sentiment": split_long_text(qa),
-    }
-
-    section_outputs = {}
-
-    for label, chunks in labeled_inputs.items():
-        update_progress(f"Analyzing {label} ({len(chunks)} chunks)")
-        outputs = []
-        for i, chunk in enumerate(chunks):
-            score_info = score_chunk_for_summary(chunk)
-
-            update_progress(f"{label}: chunk {i + 1} of {len(chunks)}")
-
-            if label == "management_sentiment":
-                prompt = f"""
+    return chunk_transcript(
+        text,
+        max_tokens=max(1, int(max_len / DEFAULT_CHARS_PER_TOKEN)),
+        overlap_tokens=0,
+        min_tokens=int(min_len / DEFAULT_CHARS_PER_TOKEN)
+    )
+
+# Render the per-chunk analysis prompt for a labeled section
+def _chunk_prompt(label: str, chunk: str, company: str) -> str:
+    template = "management_chunk" if label == "management_sentiment" else "qa_chunk"
+    return _structured(_chunk_prompt_text(label, chunk, company), template)
+
+def _chunk_prompt_text(label: str, chunk: str, company: str) -> str:
+    if label == "management_sentiment":
+        return f"""
                     You are an AI analyst evaluating this MANAGEMENT chunk from an earnings call for {company}.
 
                     Analyze it in detail and provide:
@@ -134,8 +257,8 @@ def analyze_labeled_sections(prepared: str, qa: str, company: str = "NVIDIA", qu
                     Chunk:
                     {chunk}
                 """
-            elif label == "qa_sentiment":
-                prompt = f"""
+    elif label == "qa_sentiment":
+        return f"""
                     You are an AI analyst evaluating this Q&A chunk from an earnings call for {company}.
 
                     Analyze it in detail and provide:
@@ -148,98 +271,332 @@ def analyze_labeled_sections(prepared: str, qa: str, company: str = "NVIDIA", qu
                     Chunk:
                     {chunk}
                 """
+    return f"Chunk:\n{chunk}"
 
-            path = _cache_path(prompt, company, quarter, i, is_summary=0)
-            response = _cached_or_call(prompt, path) if provider == "ollama" else "[Only Ollama supported]"
-
-            outputs.append({
-                "summary": response,
-                "score": score_info["score"],
-                "reason": score_info["reason"],
-                "chunk": chunk
-            })
-
-        section_outputs[label] = outputs
-
-    strategy_chunks = [o["summary"] for o in section_outputs.get("management_sentiment", []) if o["score"] > 0]
-    strategy_prompt = summarize_responses_prompt(strategy_chunks, "strategic_focuses", company)
-    strategy_path = _cache_path(strategy_prompt, company, quarter, custom_suffix="strategic_summary", is_summary=1)
-    strategic_summary = _cached_or_call(strategy_prompt, strategy_path)
-    final_analysis["result"]["strategic_focuses"] = strategic_summary
-
-    for label, outputs in section_outputs.items():
-        filtered_outputs = [o["summary"] for o in outputs if o["score"] > 0]
-        if not filtered_outputs:
-            print(f"[WARN] No high-signal chunks found for {label}, skipping summary.")
-            final_analysis["result"][label] = "No high-quality input found for summary."
-            continue
-
-        summary_prompt = summarize_responses_prompt(filtered_outputs, label, company)
-        summary_path = _cache_path(summary_prompt, company, quarter, custom_suffix=f"{label}_summary", is_summary=1)
-        summary = _cached_or_call(summary_prompt, summary_path)
-        final_analysis["result"][label] = summary
-
-    overall_prompt = f"""
+# Render the overall-summary prompt from the three section summaries
+def _overall_prompt(company: str, quarter: str, management: str, qa: str, strategy: str) -> str:
+    return _structured(f"""
         You are a financial analyst summarizing the {quarter} earnings call for {company}.
 
         Use the following summaries to craft a cohesive 4-5 paragraph overview:
 
         MANAGEMENT SENTIMENT:
-        {final_analysis['result']['management_sentiment']}
+        {management}
 
         Q&A SENTIMENT:
-        {final_analysis['result']['qa_sentiment']}
+        {qa}
 
         STRATEGIC THEMES:
-        {final_analysis['result']['strategic_focuses']}
-    """
-    overall_path = _cache_path(overall_prompt, company, quarter, is_summary=1)
-    overall_summary = _cached_or_call(overall_prompt, overall_path)
-    final_analysis["result"]["summary"] = overall_summary
-
-    return final_analysis
-
-# Assign a score to a chunk based on relevance indicators
-def score_chunk_for_summary(chunk_text: str) -> dict:
-    text = chunk_text.strip().lower()
-    if re.match(r"^operator[\\s,:]", text) or "conference operator" in text or "all lines have been placed on mute" in text:
+        {strategy}
+    """, "overall_summary")
+
+# Submit a stage node to the LLM pool, counting nodes reused from the stage store as cache hits.
+# Recomputed nodes are timed under the given span name (e.g. "section_summary").
+def _submit_stage(run: StageRun, name: str, fp: str, compute: Callable[[], str], progress: ProgressTracker = None, quarter: str = None, stage: str = None) -> Future:
+    if progress is not None and run.is_clean(name, fp):
+        progress.record_call(quarter, True)
+
+    def timed_compute():
+        with span(stage, progress):
+            return compute()
+    return run.submit(llm_pool, name, fp, compute if stage is None else timed_compute)
+
+# Fingerprint of a summary node: its rendered template plus the fingerprints (and selection) of its inputs
+def _summary_fingerprint(template: str, header: str, model: str, inputs: list, options: dict = None) -> str:
+    return fingerprint(template, header, PROMPT_VERSIONS.get(template, "0"), model, OLLAMA_OPTIONS if options is None else options, inputs)
+
+# Embed every chunk of the quarter in one pass and pick one representative per cluster of near-duplicates within each
+# section, so every section keeps inputs for its own summary. Returns chunk node name -> representative name (None
+# when dropped), or None when the chunks could not be embedded and every chunk should be analyzed.
+def _select_chunks(run: StageRun, section_chunks: dict, progress: ProgressTracker = None) -> dict:
+    items = [item for chunk_items in section_chunks.values() for item in chunk_items]
+    embedder = get_embedder(ollama_client)
+
+    def compute():
+        with span("embedding", progress):
+            vectors = embedding_store.embed([item["chunk"] for item in items], embedder)
+        representative, kept, covered, offset = {}, 0, 0.0, 0
+        with span("dedup", progress):
+            for label, chunk_items in section_chunks.items():
+                if not chunk_items:
+                    continue
+                names = [f"{label}_{i}" for i in range(len(chunk_items))]
+                picked = select_representatives(vectors[offset:offset + len(names)], [item["score"] for item in chunk_items])
+                representative.update((name, names[r] if r >= 0 else None) for name, r in zip(names, picked["representative"]))
+                kept += picked["kept"]
+                covered += picked["coverage"] * len(names)
+                offset += len(names)
         return {
-            "score": 0,
-            "tag": "operator_logistics",
-            "reason": "Procedural intro — not exec content"
+            "representative": representative,
+            "chunks": len(items),
+            "kept": kept,
+            "coverage": round(covered / len(items), 4) if items else 1.0,
         }
 
-    exec_names = ["jensen huang", "colette kress", "cfo", "ceo"]
-    mentions_exec = any(name in text for name in exec_names)
-
-    strategy_terms = [
-        "ai", "training", "inference", "data center", "cloud", "enterprise", "gross margin", "supply chain",
-        "export", "regulation", "autonomous", "sovereign", "robotics", "simulation", "digital twin",
-        "infrastructure", "platform", "ecosystem", "open source", "scaling", "monetization", "networking",
-        "demand", "growth", "revenue", "market", "segment", "margin", "tariff", "customers", "csp",
-        "cost", "throughput", "ramp", "manufacturing"
-    ]
-    match_count = sum(term in text for term in strategy_terms)
-
-    financial_cues = [
-        "revenue", "guidance", "fiscal", "quarter", "sequential", "yoy", "qoq", "dollars", "billion"
-    ]
-    financial_weight = sum(term in text for term in financial_cues)
-
-    tone_terms = [
-        "confident", "excited", "optimistic", "cautious", "challenging", "strong", "headwinds", "visibility"
-    ]
-    tone_weight = sum(term in text for term in tone_terms)
-
-    score = (2 if mentions_exec else 0) + match_count + financial_weight + tone_weight
-    tag = "high" if score >= 6 else "medium" if score >= 3 else "low"
-
-    return {
-        "score": score,
-        "tag": tag,
-        "reason": f"{'Exec mentioned. ' if mentions_exec else ''}{match_count} strategy terms, {financial_weight} financial cues, {tone_weight} tone cues"
+    fp = fingerprint(
+        "dedup", DEDUP_VERSION, embedder.name, DEDUP_THRESHOLD, DEDUP_NOVELTY_WEIGHT, DEDUP_KEEP_FRACTION,
+        [run.fingerprints[f"chunks:{label}"] for label in section_chunks]
+    )
+    try:
+        selection = run.node("dedup", fp, compute)
+    except (OllamaError, requests.RequestException) as e:
+        print(f"[WARN] Chunk selection skipped, could not embed chunks: {e}")
+        return None
+    print(f"[LOG] Chunk selection kept {selection['kept']} of {selection['chunks']} chunks (coverage {selection['coverage']})")
+    return selection
+
+# Condense each section's responses into its summary node. Responses that fit one prompt go straight to the summary;
+# otherwise they are packed into token-bounded batches (see plan_reduce_batches), each batch is condensed in parallel,
+# and the condensed notes are reduced again until one prompt holds them. Levels run in lockstep across sections and
+# are awaited here rather than inside a pool worker, so a small pool cannot deadlock on its own reduce calls.
+# `sections` maps node name -> (section type, [(input fingerprint, response)], fingerprint of the unreduced summary).
+# Reduce batches run on the model routed to the summary they feed.
+def _reduce_sections(run: StageRun, sections: dict, company: str, quarter: str, routes: dict, progress: ProgressTracker = None, on_partial: Callable = None) -> dict:
+    futures, depth = {}, 0
+
+    def stage_of(section_type):
+        return "strategic_summary" if section_type == "strategic_focuses" else "section_summary"
+
+    def submit_summary(name, section_type, items, fp, share=None):
+        model, options = routes[stage_of(section_type)]
+        responses = [text if share is None else fit_response(text, share, model) for _, text in items]
+        futures[name] = _submit_stage(
+            run, name, fp,
+            lambda: _cached_or_call(summarize_responses_prompt(responses, section_type, company), "section_summary", company, quarter, name, model, progress, on_partial, options=options),
+            progress, quarter, stage_of(section_type)
+        )
+
+    while sections:
+        level = {}
+        for name, (section_type, items, fp) in sections.items():
+            if SUMMARY_REDUCE != "hierarchical":
+                submit_summary(name, section_type, items, fp)
+                continue
+            model, options = routes[stage_of(section_type)]
+            budget = summary_batch_budget(options, model, _format_suffix("section_summary"))
+            batches = plan_reduce_batches([text for _, text in items], budget, model=model)
+            if len(batches) <= 1:
+                # Everything fits one prompt; a single response over budget on its own is cut down to it
+                submit_summary(name, section_type, items, fp, share=budget)
+                continue
+            if depth >= SUMMARY_MAX_DEPTH:
+                share = budget // len(items)
+                print(f"[WARN] {name}: {len(items)} responses still do not fit one prompt after SUMMARY_MAX_DEPTH={SUMMARY_MAX_DEPTH} reduce levels; cutting each to {share} tokens")
+                submit_summary(name, section_type, items, fp, share=share)
+                continue
+
+            # When no two responses fit a batch together, every response is condensed on its own so the next level
+            # has smaller inputs; otherwise lone responses that fit the budget are carried up unchanged
+            merging = len(batches) < len(items)
+            level[name] = []
+            for j, batch in enumerate(batches):
+                batch_items = [items[i] for i in batch]
+                if len(batch_items) == 1 and merging and approx_tokens(batch_items[0][1], model) + RESPONSE_SEPARATOR_TOKENS <= budget:
+                    level[name].append((batch_items[0][0], None, batch_items[0][1]))
+                    continue
+                node = f"{name}:reduce{depth}_{j}"
+                responses = [fit_response(text, budget, model) for _, text in batch_items]
+                node_fp = _summary_fingerprint("section_reduce", reduce_responses_prompt([], section_type, company), model, [item_fp for item_fp, _ in batch_items], options)
+                compute = lambda node=node, responses=responses, section_type=section_type, model=model, options=options: _cached_or_call(
+                    reduce_responses_prompt(responses, section_type, company), "section_reduce", company, quarter, node, model, progress, on_partial, options=options
+                )
+                level[name].append((node_fp, _submit_stage(run, node, node_fp, compute, progress, quarter, "section_reduce"), None))
+
+        reduced = {}
+        for name, entries in level.items():
+            section_type = sections[name][0]
+            model, options = routes[stage_of(section_type)]
+            items = [(node_fp, future.result() if future is not None else text) for node_fp, future, text in entries]
+            reduced[name] = (section_type, items, _summary_fingerprint("section_summary", summarize_responses_prompt([], section_type, company), model, [item_fp for item_fp, _ in items], options))
+        sections, depth = reduced, depth + 1
+    return futures
+
+# Analyze sentiment and strategy from labeled transcript sections.
+# The work is a stage graph (chunk -> chunk analysis -> section summary -> strategy/overall summary) where each
+# node is fingerprinted from its inputs, so a re-run only recomputes dirty nodes and their descendants.
+# Each stage runs on the model routed to it (see routes_for); `model` is the default for stages without their own.
+def analyze_labeled_sections(prepared: str, qa: str, company: str = "NVIDIA", quarter: str = "QX", provider: str = "ollama", model: str = None, progress: ProgressTracker = None, on_partial: Callable[[str, str, str], None] = None, models: dict = None) -> dict:
+    model = model or OLLAMA_MODEL
+    routes = routes_for(model, models)
+    chunk_model, chunk_options = routes["chunk_analysis"]
+    started = time.perf_counter()
+    update_progress("Preprocessing labeled sections", progress)
+    if progress is not None:
+        progress.start_stage(quarter, "chunking")
+
+    final_analysis = {
+        "company": company,
+        "provider": provider,
+        "model": model,
+        "models": {stage: stage_model for stage, (stage_model, _) in routes.items() if stage != "tone_compare"},
+        "signal": "labeled_analysis",
+        "result": {}
+    }
+
+    run = StageRun(stage_store, *_cache_label(company, quarter))
+    scorer = get_scorer(company)
+    chunk_config = {
+        "budget": chunk_token_budget(chunk_options, chunk_model, _format_suffix("management_chunk")),
+        "overlap": CHUNK_OVERLAP_TOKENS,
+        "chars_per_token": chars_per_token(chunk_model),
+        "lexicon": scorer.lexicon,
+        "scorer": SCORER_VERSION,
     }
 
+    # Stage 0: chunk and score each section inline (cheap, but it decides the shape of the rest of the graph)
+    section_chunks = {}
+    for label, text in (("management_sentiment", prepared), ("qa_sentiment", qa)):
+        def compute_chunks(text=text):
+            with span("chunking", progress):
+                chunks = chunk_transcript(text, model=chunk_model, options=chunk_options, prompt_suffix=_format_suffix("management_chunk"))
+            with span("scoring", progress):
+                scores = scorer.score_many(chunks)
+            return [
+                {"chunk": chunk, "score": score_info["score"], "reason": score_info["reason"]}
+                for chunk, score_info in zip(chunks, scores)
+            ]
+        section_chunks[label] = run.node(f"chunks:{label}", fingerprint("chunks", text, chunk_config), compute_chunks)
+
+    # Stage 0b (CHUNK_DEDUP): near-duplicate chunks are not analyzed; they reuse their representative's analysis
+    selection = None
+    if CHUNK_DEDUP and provider == "ollama":
+        selection = _select_chunks(run, section_chunks, progress)
+    if selection is not None:
+        final_analysis["selection"] = {key: selection[key] for key in ("chunks", "kept", "coverage")}
+
+    if progress is not None:
+        progress.set_chunks(quarter, sum(len(items) for items in section_chunks.values()))
+        progress.start_stage(quarter, "chunk_analysis")
+
+    # Stage 1: dispatch every dirty chunk prompt to the bounded pool; futures keep chunk order
+    futures = {}
+    for label, items in section_chunks.items():
+        update_progress(f"Analyzing {label} ({len(items)} chunks)", progress)
+        template = "management_chunk" if label == "management_sentiment" else "qa_chunk"
+        for i, item in enumerate(items):
+            name = f"{label}_{i}"
+            if provider != "ollama" or (selection is not None and selection["representative"][name] != name):
+                continue
+            prompt = _chunk_prompt(label, item["chunk"], company)
+            compute = lambda prompt=prompt, template=template, name=name: _cached_or_call(prompt, template, company, quarter, name, chunk_model, progress, on_partial, options=chunk_options)
+            futures[name] = _submit_stage(run, name, _cache_key(prompt, template, chunk_model, chunk_options), compute, progress, quarter, "chunk_analysis")
+
+    section_outputs, signals = {}, []
+    structured_chunks = _response_format("management_chunk") is not None
+    for label, items in section_chunks.items():
+        outputs = []
+        for i, item in enumerate(items):
+            name = f"{label}_{i}"
+            represented_by = selection["representative"][name] if selection is not None else name
+            if provider != "ollama":
+                response = "[Only Ollama supported]"
+            elif represented_by is None:
+                response = "[Skipped by chunk selection]"
+            else:
+                signal = parse_signal(futures[represented_by].result(), structured_chunks)
+                response = render_signal(signal)
+                if represented_by == name:
+                    signals.append((label, f"chunk:{i}", signal))
+            update_progress(f"{label}: chunk {i + 1} of {len(items)}", progress)
+            if progress is not None:
+                progress.chunk_done(quarter)
+            output = {
+                "summary": response,
+                "score": item["score"],
+                "reason": item["reason"],
+                "chunk": item["chunk"]
+            }
+            if represented_by != name:
+                output["represented_by"] = represented_by
+            outputs.append(output)
+        section_outputs[label] = outputs
+
+    # Only chunks analyzed in their own right (not folded into a near-duplicate) with a positive score feed summaries
+    def summarized(o):
+        return o["score"] > 0 and "represented_by" not in o
+
+    # Summary inputs are the chunk analyses' fingerprints plus whether each chunk passed the score filter
+    def summary_inputs(label):
+        return [(run.fingerprints.get(f"{label}_{i}", ""), summarized(o)) for i, o in enumerate(section_outputs.get(label, []))]
+
+    # Responses that passed the score filter, keyed by their chunk analysis fingerprints for the reduce nodes
+    def summary_items(label):
+        return [(run.fingerprints.get(f"{label}_{i}", ""), o["summary"]) for i, o in enumerate(section_outputs.get(label, [])) if summarized(o)]
+
+    # Stage 2: strategy and per-section summaries only depend on chunk outputs, so run them together
+    if progress is not None:
+        progress.start_stage(quarter, "section_summary")
+    strategy_model, strategy_options = routes["strategic_summary"]
+    reductions = {
+        "strategic_summary": (
+            "strategic_focuses", summary_items("management_sentiment"),
+            _summary_fingerprint("section_summary", summarize_responses_prompt([], "strategic_focuses", company), strategy_model, summary_inputs("management_sentiment"), strategy_options)
+        )
+    }
+    for label in section_outputs:
+        items = summary_items(label)
+        if not items:
+            print(f"[WARN] No high-signal chunks found for {label}, skipping summary.")
+            continue
+        section_model, section_options = routes["section_summary"]
+        reductions[f"{label}_summary"] = (label, items, _summary_fingerprint("section_summary", summarize_responses_prompt([], label, company), section_model, summary_inputs(label), section_options))
+    summary_futures = _reduce_sections(run, reductions, company, quarter, routes, progress, on_partial)
+
+    structured_summaries = _response_format("section_summary") is not None
+    section_signals = {"strategic_focuses": parse_signal(summary_futures["strategic_summary"].result(), structured_summaries)}
+    for label in section_outputs:
+        future = summary_futures.get(f"{label}_summary")
+        if future is not None:
+            section_signals[label] = parse_signal(future.result(), structured_summaries)
+        else:
+            final_analysis["result"][label] = "No high-quality input found for summary."
+    for label, signal in section_signals.items():
+        final_analysis["result"][label] = render_signal(signal)
+
+    # Stage 3: overall summary waits on all section summaries
+    if progress is not None:
+        progress.start_stage(quarter, "overall_summary")
+    result = final_analysis["result"]
+    overall_model, overall_options = routes["overall_summary"]
+    overall_fp = fingerprint(
+        "overall_summary", _overall_prompt(company, quarter, "", "", ""), PROMPT_VERSIONS["overall_summary"], overall_model, overall_options,
+        [run.fingerprints.get(name, result.get(label)) for name, label in (
+            ("management_sentiment_summary", "management_sentiment"),
+            ("qa_sentiment_summary", "qa_sentiment"),
+            ("strategic_summary", "strategic_focuses"),
+        )]
+    )
+    overall_signal = parse_signal(_submit_stage(
+        run, "summary", overall_fp,
+        lambda: _cached_or_call(
+            _overall_prompt(company, quarter, result["management_sentiment"], result["qa_sentiment"], result["strategic_focuses"]),
+            "overall_summary", company, quarter, "summary", overall_model, progress, on_partial, options=overall_options
+        ),
+        progress, quarter, "overall_summary"
+    ).result(), _response_format("overall_summary") is not None)
+    overall_summary = render_signal(overall_signal)
+    final_analysis["result"]["summary"] = overall_summary
+    # Keyed by the model that wrote the summary, which is also the model its response cache entry is labeled with
+    summary_store.put(company, quarter, overall_model, overall_summary)
+    if STRUCTURED_OUTPUT and provider == "ollama":
+        section_signals["overall"] = overall_signal
+        final_analysis["signals"] = {section: signal.to_dict() for section, signal in section_signals.items()}
+        signal_store.put_quarter(company, quarter, overall_model, signals + [(section, "summary", signal) for section, signal in section_signals.items()])
+    final_analysis["stages"] = run.finish()
+    if progress is not None:
+        progress.start_stage(quarter, "done")
+    elapsed = time.perf_counter() - started
+    observe_span("analyze_quarter", elapsed, progress)
+    if progress is not None:
+        progress.record_quarter_time(quarter, elapsed)
+
+    return final_analysis
+
+# Assign a score to a chunk based on the company's weighted term lexicon
+@timed("scoring")
+def score_chunk_for_summary(chunk_text: str, company: str = "NVIDIA") -> dict:
+    return get_scorer(company).score(chunk_text)
+
 # Construct a summarization prompt given a list of chunk summaries
 def summarize_responses_prompt(chunks: List[str], section_type: str, company: str = "NVIDIA") -> str:
     prompt_header = {
@@ -285,11 +642,29 @@ def summarize_responses_prompt(chunks: List[str], section_type: str, company: st
             Responses:
             """
     }
-    body = "\n\n".join([f"{i+1}. {text.strip()}" for i, text in enumerate(chunks)])
-    return prompt_header.get(section_type, "Responses:\n") + body
+    return _structured(prompt_header.get(section_type, "Responses:\n") + _numbered_responses(chunks), "section_summary")
+
+def _numbered_responses(chunks: List[str]) -> str:
+    return "\n\n".join([f"{i+1}. {text.strip()}" for i, text in enumerate(chunks)])
+
+# Construct a prompt that condenses one batch of responses into notes for the next level of a hierarchical summary
+def reduce_responses_prompt(chunks: List[str], section_type: str, company: str = "NVIDIA") -> str:
+    keep = {
+        "management_sentiment": "the tone label (Positive, Neutral or Negative), executive quotes that carry emotional cues, repeated strategic themes, shifts in tone and external factors",
+        "qa_sentiment": "the tone label (Positive, Neutral or Negative), the nature of the analyst questions, how executives responded, recurring concerns and telling quotes",
+        "strategic_focuses": "each strategic theme or initiative, what executives said about it, and whether it is a Current Achievement, a Future Initiative or Both",
+    }.get(section_type, "the key points")
+    prompt_header = f"""You are given one batch of evaluations from a quarterly earnings call for {company}. Other batches are being condensed separately and all of the notes will be combined afterwards.
+
+            Condense this batch into a single set of notes that keeps {keep}.
+            Merge points that repeat, keep specific figures and quotes, and **do not** add anything that is not in the responses.
+
+            Responses:
+            """
+    return prompt_header + _numbered_responses(chunks)
 
 # Generate a comparison between tone summaries of two quarters
-def compare_tone(summary1: str, summary2: str, company: str = "NVIDIA", quarter1: str = "Q1", quarter2: str = "Q2") -> str:
+def compare_tone(summary1: str, summary2: str, company: str = "NVIDIA", quarter1: str = "Q1", quarter2: str = "Q2", model: str = None, progress: ProgressTracker = None, on_partial: Callable[[str, str, str], None] = None, options: dict = None) -> str:
     prompt = f"""
         Compare the tone between these two quarterly earnings call excerpts for {company}.
         Summarize how the tone has changed — is it more optimistic, cautious, aggressive, concerned, etc.?
@@ -301,6 +676,24 @@ def compare_tone(summary1: str, summary2: str, company: str = "NVIDIA", quarter1
         {summary2}
     """
     cache_id = f"{quarter1}_vs_{quarter2}"
-    path = _cache_path(prompt, company, cache_id, None, is_summary=2)
-    result = _cached_or_call(prompt, path)
+    with span("tone_compare", progress):
+        result = _cached_or_call(prompt, "tone_compare", company, cache_id, "tone", model, progress, on_partial, options=options)
     return result
+
+# Compare tone for each (earlier, later) quarter pair concurrently on the shared LLM pool; pairs missing a summary are skipped.
+# Summaries are looked up under the overall_summary model and compared on the tone_compare model.
+def compare_tone_pairs(company: str, pairs: List[tuple], model: str = None, progress: ProgressTracker = None, on_partial: Callable[[str, str, str], None] = None, models: dict = None) -> List[dict]:
+    routes = routes_for(model, models)
+    summary_model = routes["overall_summary"][0]
+    tone_model, tone_options = routes["tone_compare"]
+    pending = []
+    for quarter1, quarter2 in pairs:
+        summary1 = get_quarter_summary(company, quarter1, summary_model)
+        summary2 = get_quarter_summary(company, quarter2, summary_model)
+        if summary1 is None or summary2 is None:
+            print(f"[WARN] Missing summary for {quarter1} or {quarter2}, skipping...")
+            continue
+        future = llm_pool.submit(compare_tone, summary1, summary2, company, quarter1, quarter2, tone_model, progress, on_partial, tone_options)
+        pending.append((quarter1, quarter2, future))
+
+    return [{"from": quarter1, "to": quarter2, "result": future.result()} for quarter1, quarter2, future in pending]
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+# Bump to invalidate every stored entry when the stored content format changes
+CACHE_SCHEMA_VERSION = 1
+
+# How many writes to accept between eviction passes
+EVICT_EVERY = 50
+
+# Build a content-addressed key from everything that influences a generation
+def make_cache_key(model: str, prompt: str, template_version: str = "", options: Optional[Dict] = None) -> str:
+    payload = json.dumps({
+        "schema": CACHE_SCHEMA_VERSION,
+        "model": model,
+        "prompt": prompt,
+        "template_version": template_version,
+        "options": options or {},
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Shared setup of the SQLite-backed stores: one WAL-mode connection used from every thread behind a lock, with
+# the schema script applied on open
+class SqliteStore:
+    def __init__(self, path: str, schema: str, synchronous: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        if synchronous:
+            self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.executescript(schema)
+        self._conn.commit()
+
+# SQLite-backed store of LLM responses with hit/miss stats and LRU eviction
+class ResponseCache(SqliteStore):
+    def __init__(self, path: str, max_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        super().__init__(path, """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                company TEXT,
+                quarter TEXT,
+                name TEXT,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_label ON responses (company, quarter, name, model, created_at);
+            CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access);
+        """, synchronous="NORMAL")
+        self.evict()
+
+    # Return the cached content for a key, or None on a miss
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE responses SET last_access = ?, hit_count = hit_count + 1 WHERE key = ?",
+                (time.time(), key)
+            )
+            self._conn.commit()
+            return row[0]
+
+    # Store a response along with the labels used for lookups and inspection
+    def put(self, key: str, content: str, model: str, company: str = None, quarter: str = None, name: str = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO responses
+                    (key, model, company, quarter, name, content, size, created_at, last_access, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+            """, (key, model, company, quarter, name, content, len(content.encode("utf-8")), now, now))
+            self._conn.commit()
+            self._writes += 1
+            should_evict = self._writes % EVICT_EVERY == 0
+
+        if should_evict:
+            self.evict()
+
+    # Return the most recent response stored under a company/quarter/name label
+    def lookup(self, company: str, quarter: str, name: str, model: str = None) -> Optional[str]:
+        query = "SELECT content FROM responses WHERE company = ? AND quarter = ? AND name = ?"
+        params = [company, quarter, name]
+        if model:
+            query += " AND model = ?"
+            params.append(model)
+        query += " ORDER BY created_at DESC LIMIT 1"
+
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return row[0] if row else None
+
+    # Drop expired entries, then least recently used entries until under the size budget
+    def evict(self) -> int:
+        removed = 0
+        with self._lock:
+            if self.max_age_seconds:
+                cutoff = time.time() - self.max_age_seconds
+                removed += self._conn.execute("DELETE FROM responses WHERE last_access < ?", (cutoff,)).rowcount
+
+            if self.max_bytes:
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    stale = []
+                    for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+                        if total <= self.max_bytes:
+                            break
+                        stale.append((key,))
+                        total -= size
+                    self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+                    removed += len(stale)
+
+            self._conn.commit()
+
+        if removed:
+            print(f"[CACHE] Evicted {removed} entries from {self.path}")
+        return removed
+
+    # Summarize hit/miss counters and on-disk usage
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": self.max_age_seconds,
+        }
@@ -0,0 +1,175 @@
+import math
+import os
+import re
+from typing import Dict, List, Optional
+
+# Context Ollama allocates when num_ctx is not set explicitly
+DEFAULT_NUM_CTX = int(os.getenv("DEFAULT_NUM_CTX", "2048"))
+# Tokens reserved for the prompt template wrapped around each chunk
+PROMPT_OVERHEAD_TOKENS = int(os.getenv("PROMPT_OVERHEAD_TOKENS", "250"))
+# Tokens reserved for the model's answer when num_predict is not set
+RESPONSE_RESERVE_TOKENS = int(os.getenv("RESPONSE_RESERVE_TOKENS", "512"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "0"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "0"))
+
+# Rough characters-per-token for common model families' tokenizers on English prose
+MODEL_CHARS_PER_TOKEN = {
+    "mistral": 3.7,
+    "mixtral": 3.7,
+    "llama": 4.0,
+    "gemma": 4.0,
+    "phi": 3.8,
+    "qwen": 3.6,
+}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Speaker lines look like "Colette Kress -- Chief Financial Officer" or a bare "Operator"
+SPEAKER_PATTERN = re.compile(r"^(?:Operator|[A-Z][\w.,'’ -]{1,60}?\s*(?:--|—|–)\s*\S.{0,100})$")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+def chars_per_token(model: Optional[str]) -> float:
+    family = (model or "").lower()
+    for prefix, ratio in MODEL_CHARS_PER_TOKEN.items():
+        if family.startswith(prefix):
+            return ratio
+    return DEFAULT_CHARS_PER_TOKEN
+
+# Approximate token count without loading the model's tokenizer
+def approx_tokens(text: str, model: Optional[str] = None) -> int:
+    return math.ceil(len(text) / chars_per_token(model))
+
+# Largest chunk that fits in the model's context next to the prompt template and the answer; `prompt_suffix` is
+# text appended to every prompt on top of the template (e.g. output format instructions), counted with the same
+# estimator as the chunks
+def chunk_token_budget(options: Optional[Dict] = None, model: Optional[str] = None, prompt_suffix: str = "") -> int:
+    if CHUNK_MAX_TOKENS:
+        return CHUNK_MAX_TOKENS
+    options = options or {}
+    num_ctx = int(options.get("num_ctx") or DEFAULT_NUM_CTX)
+    num_predict = int(options.get("num_predict") or 0)
+    reserve = num_predict if num_predict > 0 else RESPONSE_RESERVE_TOKENS
+    suffix = approx_tokens(prompt_suffix, model) if prompt_suffix else 0
+    return max(128, num_ctx - PROMPT_OVERHEAD_TOKENS - suffix - reserve)
+
+def is_speaker_line(line: str) -> bool:
+    return len(line) <= 160 and bool(SPEAKER_PATTERN.match(line))
+
+# Group transcript lines into speaker turns: [speaker line, paragraph, paragraph, ...]
+def split_speaker_turns(text: str) -> List[List[str]]:
+    turns: List[List[str]] = []
+    for line in (l.strip() for l in text.splitlines()):
+        if not line:
+            continue
+        if is_speaker_line(line) or not turns:
+            turns.append([line])
+        else:
+            turns[-1].append(line)
+    return turns
+
+# Break a paragraph that alone exceeds the budget at sentence boundaries, hard-splitting only run-on text
+def _split_paragraph(paragraph: str, budget: int, model: Optional[str]) -> List[str]:
+    max_chars = int(budget * chars_per_token(model))
+    pieces, current, current_len = [], [], 0
+    for sentence in SENTENCE_SPLIT.split(paragraph):
+        while len(sentence) > max_chars:
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and current_len + len(sentence) + 1 > max_chars:
+            pieces.append(" ".join(current))
+            current, current_len = [], 0
+        current.append(sentence)
+        current_len += len(sentence) + 1
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+# Pack speaker turns into chunks that fit the token budget, with optional overlap between neighbours
+def chunk_transcript(
+    text: str,
+    model: Optional[str] = None,
+    options: Optional[Dict] = None,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+    min_tokens: int = 0,
+    prompt_suffix: str = "",
+) -> List[str]:
+    budget = max_tokens or chunk_token_budget(options, model, prompt_suffix)
+    overlap = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    overlap = min(overlap, budget // 2)
+
+    chunks: List[str] = []
+    lines: List[str] = []
+    sizes: List[int] = []
+    total = 0
+    # Lines added since the last flush; a chunk made only of carried overlap is never emitted
+    fresh = 0
+
+    def flush():
+        nonlocal lines, sizes, total, fresh
+        if fresh and total >= min_tokens:
+            chunks.append("\n".join(lines))
+        fresh = 0
+
+        # Carry trailing lines forward as overlap so context spans the boundary
+        carried, carried_sizes, carried_total = [], [], 0
+        for line, size in zip(reversed(lines), reversed(sizes)):
+            if carried_total + size > overlap:
+                break
+            carried.append(line)
+            carried_sizes.append(size)
+            carried_total += size
+        lines, sizes, total = carried[::-1], carried_sizes[::-1], carried_total
+
+    def add(line: str, size: int):
+        nonlocal total, fresh
+        lines.append(line)
+        sizes.append(size)
+        total += size
+        fresh += 1
+
+    for turn in split_speaker_turns(text):
+        turn_sizes = [approx_tokens(line, model) + 1 for line in turn]
+        turn_total = sum(turn_sizes)
+
+        # Keep whole turns together whenever they fit
+        if total + turn_total <= budget:
+            for line, size in zip(turn, turn_sizes):
+                add(line, size)
+            continue
+
+        if turn_total <= budget:
+            if fresh:
+                flush()
+            # Overlap must never push a fitting turn over the budget
+            if total + turn_total > budget:
+                lines, sizes, total = [], [], 0
+            for line, size in zip(turn, turn_sizes):
+                add(line, size)
+            continue
+
+        # Oversized turn: split at paragraph boundaries, repeating the speaker line on each piece
+        speaker = turn[0] if is_speaker_line(turn[0]) else None
+        speaker_size = turn_sizes[0] if speaker else 0
+        paragraphs = list(zip(turn[1:], turn_sizes[1:])) if speaker else list(zip(turn, turn_sizes))
+        if fresh:
+            flush()
+        if speaker and total + speaker_size <= budget:
+            add(speaker, speaker_size)
+
+        for paragraph, size in paragraphs:
+            if size > budget - speaker_size:
+                pieces = [(p, approx_tokens(p, model) + 1) for p in _split_paragraph(paragraph, budget - speaker_size, model)]
+            else:
+                pieces = [(paragraph, size)]
+            for piece, piece_size in pieces:
+                if total + piece_size > budget:
+                    flush()
+                    if total + piece_size > budget:
+                        lines, sizes, total = [], [], 0
+                    if speaker and total + speaker_size + piece_size <= budget:
+                        add(speaker, speaker_size)
+                add(piece, piece_size)
+
+    flush()
+
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
@@ -0,0 +1,71 @@
+import math
+import os
+from typing import Dict, List
+
+import numpy as np
+
+# Embed each quarter's chunks and send only one representative per cluster of near-duplicates to the LLM
+CHUNK_DEDUP = os.getenv("CHUNK_DEDUP", "false").lower() in ("1", "true", "yes")
+# Cosine similarity at or above which two chunks count as near-duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+# Share of a chunk's rank that comes from novelty (distance to its closest neighbour) instead of its lexicon score
+DEDUP_NOVELTY_WEIGHT = min(1.0, max(0.0, float(os.getenv("DEDUP_NOVELTY_WEIGHT", "0.5"))))
+# Most chunks sent to the LLM, as a fraction of the quarter's chunks; lower-ranked representatives past it are dropped
+DEDUP_KEEP_FRACTION = min(1.0, max(0.0, float(os.getenv("DEDUP_KEEP_FRACTION", "1.0"))))
+# Bump when selection rules change so recorded selections are recomputed
+DEDUP_VERSION = "2"
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+# Rank chunks by a blend of their normalized score and novelty, then walk them best-first: a chunk within
+# `threshold` of an already kept chunk joins that chunk's cluster, otherwise it is kept as a new representative
+# (until the keep budget runs out, after which it is dropped).
+# Returns per chunk the index of its representative (itself when kept, -1 when dropped), the rank used and the
+# coverage: the mean similarity of every chunk to its closest representative.
+def select_representatives(
+    vectors: np.ndarray,
+    scores: List[float],
+    threshold: float = DEDUP_THRESHOLD,
+    novelty_weight: float = DEDUP_NOVELTY_WEIGHT,
+    keep_fraction: float = DEDUP_KEEP_FRACTION,
+) -> Dict:
+    n = len(scores)
+    if n == 0:
+        return {"representative": [], "rank": [], "kept": 0, "coverage": 1.0}
+
+    unit = _unit_rows(np.asarray(vectors, dtype=np.float32))
+    similarity = unit @ unit.T
+    np.fill_diagonal(similarity, 1.0)
+
+    neighbours = similarity.copy()
+    np.fill_diagonal(neighbours, -1.0)
+    novelty = 1.0 - np.clip(neighbours.max(axis=1), 0.0, 1.0) if n > 1 else np.ones(1)
+
+    score = np.clip(np.asarray(scores, dtype=np.float64), 0.0, None)
+    score = score / score.max() if score.max() > 0 else score
+    rank = (1.0 - novelty_weight) * score + novelty_weight * novelty
+
+    budget = max(1, math.ceil(keep_fraction * n))
+    representative = [-1] * n
+    kept: List[int] = []
+    # Stable sort keeps transcript order among equally ranked chunks
+    for i in np.argsort(-rank, kind="stable"):
+        i = int(i)
+        if kept:
+            closest = kept[int(np.argmax(similarity[i, kept]))]
+            if similarity[i, closest] >= threshold:
+                representative[i] = closest
+                continue
+        if len(kept) < budget:
+            kept.append(i)
+            representative[i] = i
+
+    coverage = float(similarity[:, kept].max(axis=1).clip(0.0, 1.0).mean())
+    return {
+        "representative": representative,
+        "rank": [round(float(r), 4) for r in rank],
+        "kept": len(kept),
+        "coverage": round(coverage, 4),
+    }
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import re
+import time
+import zlib
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.cache import SqliteStore
+
+# Which embedder vectorizes chunks: "ollama" (the /api/embed endpoint) or "hashing" (local, no model needed)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "ollama").lower()
+OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+# Texts sent per /api/embed request
+EMBED_BATCH_SIZE = max(1, int(os.getenv("EMBED_BATCH_SIZE", "32")))
+HASHING_DIMENSIONS = int(os.getenv("HASHING_DIMENSIONS", "1024"))
+
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9'.%-]*")
+
+# Deterministic feature-hashing embedder over words and word pairs. It needs no model, so it doubles as the
+# stub for tests and benchmarks, and it is good enough to catch near-verbatim repetition.
+class HashingEmbedder:
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = WORD_PATTERN.findall(text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, h % self.dimensions] += 1.0 if h & 0x80000000 else -1.0
+        return vectors
+
+# Embeds through Ollama in batches, reusing the app's pooled client (retries and circuit breaker included)
+class OllamaEmbedder:
+    def __init__(self, client, model: str = OLLAMA_EMBED_MODEL, batch_size: int = EMBED_BATCH_SIZE):
+        self.client = client
+        self.model = model
+        self.name = model
+        self.batch_size = batch_size
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        rows = []
+        for start in range(0, len(texts), self.batch_size):
+            rows += self.client.embed(self.model, texts[start:start + self.batch_size])
+        return np.asarray(rows, dtype=np.float32).reshape(len(texts), -1)
+
+def get_embedder(client=None, backend: str = None) -> Callable[[List[str]], np.ndarray]:
+    backend = (backend or EMBED_BACKEND).lower()
+    if backend == "hashing":
+        return HashingEmbedder()
+    if backend == "ollama":
+        return OllamaEmbedder(client)
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected ollama or hashing")
+
+def _text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+# Vectors per (embedder, text hash) as float32 blobs in SQLite, so re-runs and edited transcripts only embed new text
+class EmbeddingStore(SqliteStore):
+    def __init__(self, path: str):
+        super().__init__(path, """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                embedder TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (embedder, text_hash)
+            )
+        """)
+
+    def _load(self, embedder: str, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit on long transcripts
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE embedder = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    (embedder, *batch)
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+        return found
+
+    def _save(self, embedder: str, items: Dict[str, np.ndarray]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (embedder, text_hash, vector, created_at) VALUES (?, ?, ?, ?)",
+                [(embedder, key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items.items()]
+            )
+            self._conn.commit()
+
+    # Return an (n, dimensions) matrix for the texts, embedding only those not stored yet
+    def embed(self, texts: List[str], embedder: Callable[[List[str]], np.ndarray], name: Optional[str] = None) -> np.ndarray:
+        name = name or getattr(embedder, "name", type(embedder).__name__)
+        keys = [_text_key(text) for text in texts]
+        found = self._load(name, sorted(set(keys)))
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = embedder(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self._save(name, computed)
+            found.update(computed)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([found[key] for key in keys]).astype(np.float32, copy=False)
@@ -0,0 +1,259 @@
+import functools
+import os
+import re
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.chunking import is_speaker_line
+
+# Bump when extraction output changes so transcripts stored by an older extractor are re-scraped
+EXTRACTOR_VERSION = "3"
+
+# Which parser extracts article text: auto (fastest installed), selectolax, lxml or html.parser
+HTML_BACKEND = os.getenv("HTML_BACKEND", "auto").lower()
+
+# Section headers in document order; each one closes the section before it
+SECTION_HEADERS = (
+    ("prepared_remarks", re.compile(r"(?i)Prepared Remarks:?")),
+    ("qa_section", re.compile(r"(?i)Questions & Answers:?")),
+    (None, re.compile(r"(?i)Call Participants:?")),
+)
+SPEAKER_SEPARATOR = re.compile(r"\s*(?:--|—|–)\s*")
+
+BLOCK_TAGS = ("p", "h2")
+# Tags whose start implicitly closes an open <p>, per the HTML parsing rules html.parser does not apply
+P_CLOSERS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "div", "ul", "ol", "table", "section", "article", "blockquote", "pre", "hr"}
+# Tags that separate words inside a text block: line breaks and nested block elements
+TEXT_BREAK_TAGS = P_CLOSERS | {"br", "li", "dd", "dt", "tr", "td", "th"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+def _has_class(classes: str, wanted: str) -> bool:
+    return wanted in (classes or "").split()
+
+def _is_content_class(classes: str) -> bool:
+    return any("content" in c.lower() for c in (classes or "").split())
+
+# Streaming extractor on the standard library parser: no tree is built, text blocks are emitted as tags close
+class _BlockCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.div_depth = 0
+        self.regions = {"article": None, "fallback": None}
+        self.blocks = {"article": [], "fallback": []}
+        self.block_tag = None
+        self.buffer: List[str] = []
+        self.skip = 0
+
+    def _active(self) -> List[str]:
+        return [name for name, depth in self.regions.items() if depth is not None and depth <= self.div_depth and depth > 0]
+
+    def _close_block(self):
+        if self.block_tag is None:
+            return
+        text = _normalize("".join(self.buffer))
+        if text:
+            for name in self._active():
+                self.blocks[name].append(text)
+        self.block_tag = None
+        self.buffer = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in TEXT_BREAK_TAGS and self.block_tag is not None:
+            self.buffer.append(" ")
+        if tag in VOID_TAGS:
+            return
+        if tag in ("script", "style"):
+            self.skip += 1
+            return
+        if self.block_tag == "p" and tag in P_CLOSERS:
+            self._close_block()
+        if tag == "div":
+            self.div_depth += 1
+            classes = dict(attrs).get("class") or ""
+            if self.regions["article"] is None and _has_class(classes, "article-content"):
+                self.regions["article"] = self.div_depth
+            if self.regions["fallback"] is None and _is_content_class(classes):
+                self.regions["fallback"] = self.div_depth
+        elif self.block_tag is None and (tag in BLOCK_TAGS or tag == "strong") and self._active():
+            self.block_tag = tag
+
+    def handle_endtag(self, tag):
+        if tag in TEXT_BREAK_TAGS and self.block_tag is not None:
+            self.buffer.append(" ")
+        if tag in ("script", "style"):
+            self.skip = max(0, self.skip - 1)
+            return
+        if tag == self.block_tag:
+            self._close_block()
+        elif tag == "div":
+            self._close_block()
+            for name, depth in self.regions.items():
+                # A closed region is marked with -1 so a later div with the same class does not reopen it
+                if depth == self.div_depth:
+                    self.regions[name] = -1
+            self.div_depth = max(0, self.div_depth - 1)
+
+    def handle_data(self, data):
+        if self.block_tag is not None and not self.skip:
+            self.buffer.append(data)
+
+def _blocks_html_parser(html: str) -> Optional[List[str]]:
+    collector = _BlockCollector()
+    collector.feed(html)
+    collector.close()
+    collector._close_block()
+    for name in ("article", "fallback"):
+        if collector.regions[name] is not None:
+            return collector.blocks[name]
+    return None
+
+def _blocks_lxml(html: str) -> Optional[List[str]]:
+    import lxml.html
+
+    try:
+        doc = lxml.html.document_fromstring(html)
+    except ValueError:
+        # Strings that carry an XML encoding declaration must be parsed as bytes
+        doc = lxml.html.document_fromstring(html.encode("utf-8"))
+
+    content = next((div for div in doc.iter("div") if _has_class(div.get("class"), "article-content")), None)
+    if content is None:
+        content = next((div for div in doc.iter("div") if _is_content_class(div.get("class"))), None)
+    if content is None:
+        return None
+
+    for el in list(content.iter("script", "style")):
+        el.drop_tree()
+    # text_content() joins text nodes as-is, so give line breaks and nested blocks surrounding whitespace
+    for el in content.iter(*TEXT_BREAK_TAGS):
+        el.tail = " " + (el.tail or "")
+        if el.tag != "br":
+            el.text = " " + (el.text or "")
+    blocks = []
+    for el in content.iter("p", "h2", "strong"):
+        # A <strong> inside a paragraph or heading is already part of that block's text
+        if el.tag == "strong" and any(parent.tag in BLOCK_TAGS for parent in el.iterancestors() if parent is not content):
+            continue
+        text = _normalize(el.text_content())
+        if text:
+            blocks.append(text)
+    return blocks
+
+def _blocks_selectolax(html: str) -> Optional[List[str]]:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(["script", "style"])
+    content = tree.css_first("div.article-content")
+    if content is None:
+        content = next((div for div in tree.css("div[class]") if _is_content_class(div.attributes.get("class"))), None)
+    if content is None:
+        return None
+
+    # text(deep=True) joins text nodes as-is, so give line breaks and nested blocks surrounding whitespace
+    for node in content.css(", ".join(sorted(TEXT_BREAK_TAGS))):
+        node.insert_before(" ")
+        node.insert_after(" ")
+    blocks = []
+    for node in content.css("p, h2, strong"):
+        if node.tag == "strong":
+            parent = node.parent
+            while parent is not None and parent.mem_id != content.mem_id and parent.tag not in BLOCK_TAGS:
+                parent = parent.parent
+            if parent is not None and parent.tag in BLOCK_TAGS:
+                continue
+        text = _normalize(node.text(deep=True))
+        if text:
+            blocks.append(text)
+    return blocks
+
+# Backends in order of preference for "auto"; each returns the content div's text blocks or None
+BACKENDS: Dict[str, Callable[[str], Optional[List[str]]]] = {
+    "selectolax": _blocks_selectolax,
+    "lxml": _blocks_lxml,
+    "html.parser": _blocks_html_parser,
+}
+_MODULES = {"selectolax": "selectolax.lexbor", "lxml": "lxml.html", "html.parser": "html.parser"}
+
+@functools.lru_cache(maxsize=None)
+def available_backends() -> tuple:
+    names = []
+    for name, module in _MODULES.items():
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        names.append(name)
+    return tuple(names)
+
+# Resolve a backend name; "auto" picks the first installed C-based parser and falls back to html.parser
+def resolve_backend(name: str = None) -> str:
+    name = (name or HTML_BACKEND).lower()
+    installed = available_backends()
+    if name == "auto":
+        return installed[0]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML backend {name!r}; expected one of auto, {', '.join(BACKENDS)}")
+    if name not in installed:
+        print(f"[WARN] HTML backend {name} is not installed, using {installed[0]}")
+        return installed[0]
+    return name
+
+def _speaker_turn(line: str) -> Dict:
+    parts = SPEAKER_SEPARATOR.split(line, maxsplit=1)
+    return {"speaker": parts[0], "role": parts[1] if len(parts) > 1 else None, "paragraphs": []}
+
+# Walk the blocks once: route each into the current section (splitting a block where a header appears) and
+# group each section's blocks into speaker turns as they arrive
+def split_sections(blocks: Iterable[str]) -> Optional[Dict]:
+    sections = {"operator_intro": [], "prepared_remarks": [], "qa_section": []}
+    turns = {"prepared_remarks": [], "qa_section": []}
+    current, next_header = "operator_intro", 0
+
+    def add(section, text):
+        text = text.strip()
+        if not text or section is None:
+            return
+        sections[section].append(text)
+        if section not in turns:
+            return
+        if is_speaker_line(text):
+            turns[section].append(_speaker_turn(text))
+        elif turns[section]:
+            turns[section][-1]["paragraphs"].append(text)
+        else:
+            turns[section].append({"speaker": None, "role": None, "paragraphs": [text]})
+
+    for block in blocks:
+        while current is not None and next_header < len(SECTION_HEADERS):
+            section, pattern = SECTION_HEADERS[next_header]
+            match = pattern.search(block)
+            if match is None:
+                break
+            add(current, block[:match.start()])
+            block = block[match.end():]
+            current, next_header = section, next_header + 1
+        if current is None:
+            break
+        add(current, block)
+
+    if next_header < 2:
+        return None
+
+    result = {name: "\n".join(lines) for name, lines in sections.items()}
+    for section, key in (("prepared_remarks", "prepared_turns"), ("qa_section", "qa_turns")):
+        result[key] = [{"speaker": t["speaker"], "role": t["role"], "text": "\n".join(t["paragraphs"])} for t in turns[section]]
+    return result
+
+# Extract the article's sections and speaker turns; returns None with a reason when the page does not fit
+def extract_transcript(html: str, backend: str = None) -> tuple:
+    blocks = BACKENDS[resolve_backend(backend)](html)
+    if blocks is None:
+        return None, "No content found"
+    sections = split_sections(blocks)
+    if sections is None:
+        return None, "Could not locate all sections"
+    return sections, None
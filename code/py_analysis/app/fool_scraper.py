@@ -1,9 +1,13 @@
 import requests
-from bs4 import BeautifulSoup
 import re
 from datetime import datetime
 from typing import Dict
 
+from app.extraction import EXTRACTOR_VERSION, extract_transcript
+from app.metrics import timed
+
+REQUEST_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
 # Attempt to infer the fiscal quarter from the transcript URL
 def detect_quarter_from_url(url: str) -> str:
     match = re.search(r"q([1-4])-(\d{4})", url.lower())
@@ -18,59 +22,43 @@ def extract_date_from_url(url: str) -> str:
         return f"{match.group(1)}-{match.group(2)}-{match.group(3)}"
     return datetime.today().strftime("%Y-%m-%d")
 
-# Scrape and extract transcript sections from a Motley Fool article
-def scrape_transcript_from_url(url: str) -> Dict | None:
-    try:
-        res = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-        res.raise_for_status()
-        soup = BeautifulSoup(res.text, "html.parser")
-
-        # Attempt to locate the main article content
-        content_div = soup.find("div", class_="article-content")
-        if not content_div:
-            # Fallback: search for a <div> with "content" in its class name
-            for div in soup.find_all("div"):
-                classes = div.get("class", [])
-                if any("content" in c.lower() for c in classes):
-                    content_div = div
-                    break
-
-        if not content_div:
-            print(f"[WARN] No content found at {url}")
-            return None
+# Fetch a Motley Fool article, reusing a pooled session when one is provided
+@timed("fetch")
+def fetch_transcript_html(url: str, session: requests.Session | None = None) -> str:
+    http = session or requests
+    res = http.get(url, headers=REQUEST_HEADERS, timeout=10)
+    res.raise_for_status()
+    return res.text
 
-        # Extract text from all relevant tags
-        text_blocks = [tag.get_text(strip=True) for tag in content_div.find_all(["p", "h2", "strong"]) if tag.get_text(strip=True)]
-        full_text = "\n".join(text_blocks)
+# Extract transcript sections and speaker turns from the HTML of a Motley Fool article
+@timed("parse")
+def parse_transcript_html(html: str, url: str, backend: str = None) -> Dict | None:
+    sections, problem = extract_transcript(html, backend)
+    if sections is None:
+        print(f"[WARN] {problem} at {url}")
+        return None
 
-        # Locate section headers using regular expressions
-        prepared_header = re.search(r"(?i)Prepared Remarks:?", full_text)
-        qa_header = re.search(r"(?i)Questions & Answers:?", full_text)
-        end_header = re.search(r"(?i)Call Participants:?", full_text)
+    prepared_remarks = sections["prepared_remarks"]
+    qa_section = sections["qa_section"]
 
-        if not prepared_header or not qa_header:
-            print(f"[WARN] Could not locate all sections in {url}")
-            return None
-
-        # Determine text boundaries
-        start_prepared = prepared_header.end()
-        start_qa = qa_header.end()
-        end_idx = end_header.start() if end_header else len(full_text)
-
-        operator_intro = full_text[:prepared_header.start()].strip()
-        prepared_remarks = full_text[start_prepared:qa_header.start()].strip()
-        qa_section = full_text[start_qa:end_idx].strip()
-
-        return {
-            "quarter": detect_quarter_from_url(url),
-            "date": extract_date_from_url(url),
-            "transcript": f"{prepared_remarks}\n\n{qa_section}".strip(),
-            "prepared_remarks": prepared_remarks,
-            "qa_section": qa_section,
-            "operator_intro": operator_intro,
-            "source": url
-        }
+    return {
+        "quarter": detect_quarter_from_url(url),
+        "date": extract_date_from_url(url),
+        "transcript": f"{prepared_remarks}\n\n{qa_section}".strip(),
+        "prepared_remarks": prepared_remarks,
+        "qa_section": qa_section,
+        "operator_intro": sections["operator_intro"],
+        "prepared_turns": sections["prepared_turns"],
+        "qa_turns": sections["qa_turns"],
+        "source": url,
+        "extractor": EXTRACTOR_VERSION
+    }
 
+# Scrape and extract transcript sections from a Motley Fool article
+@timed("scrape")
+def scrape_transcript_from_url(url: str, session: requests.Session | None = None) -> Dict | None:
+    try:
+        return parse_transcript_html(fetch_transcript_html(url, session), url)
     except Exception as e:
         print(f"[ERROR] Failed to scrape {url}: {e}")
-        return None
\ No newline at end of file
+        return None
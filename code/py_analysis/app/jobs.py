@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+JOB_WORKERS = max(1, int(os.getenv("JOB_WORKERS", "2")))
+JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", "200"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# A single queued analysis and its lifecycle state
+class Job:
+    def __init__(self, key: str, params: Dict):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.params = params
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.submissions = 1
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    # Block until the job finishes or the timeout expires; returns whether it finished
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "submissions": self.submissions,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+# Local worker pool that runs analyses in the background and coalesces identical submissions
+class JobQueue:
+    def __init__(self, runner: Callable[[Job], Dict], workers: int = JOB_WORKERS, history_limit: int = JOB_HISTORY_LIMIT):
+        self.runner = runner
+        self.history_limit = history_limit
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._inflight: Dict[str, Job] = {}
+
+    # Jobs with the same parameters share a key regardless of argument order
+    @staticmethod
+    def job_key(params: Dict) -> str:
+        return json.dumps(params, sort_keys=True)
+
+    # Enqueue a job, or attach to the in-flight job with identical parameters; returns (job, coalesced)
+    def submit(self, params: Dict) -> tuple:
+        key = self.job_key(params)
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                existing.submissions += 1
+                return existing, True
+
+            job = Job(key, params)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+            self._trim_history()
+
+        self._pool.submit(self._run, job)
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> list:
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = self.runner(job)
+            job.status = DONE
+        except Exception as e:
+            print(f"[ERROR] Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+            job._done.set()
+
+    # Forget the oldest finished jobs once the history grows past its limit
+    def _trim_history(self):
+        overflow = len(self._jobs) - self.history_limit
+        if overflow <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished][:overflow]:
+            del self._jobs[job_id]
@@ -0,0 +1,163 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+# Latency buckets in seconds, from a cache read up to a long generation on CPU
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+# Base for labelled metric families; values are kept per label tuple under one lock
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines += self._samples()
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in sorted(self._values.items())]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in sorted(self._values.items())]
+
+# Cumulative-bucket histogram in the Prometheus text format (_bucket, _sum, _count)
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def _samples(self) -> list:
+        lines = []
+        for key, state in sorted(self._values.items()):
+            bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, state["counts"] + [state["count"]]):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state['count']}")
+        return lines
+
+# Process-wide set of metric families, rendered in registration order for /metrics
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+registry = MetricsRegistry()
+
+SPAN_SECONDS = registry.histogram("earnings_span_seconds", "Wall-clock seconds spent in each instrumented pipeline step", ("span",))
+LLM_REQUESTS = registry.counter("earnings_llm_requests_total", "Prompt lookups by template and whether the response cache served them", ("template", "result"))
+OLLAMA_TOKENS = registry.counter("earnings_ollama_tokens_total", "Tokens Ollama reported processing, by model and kind (prompt or eval)", ("model", "kind"))
+OLLAMA_SECONDS = registry.counter("earnings_ollama_seconds_total", "Seconds Ollama reported spending, by model and phase", ("model", "phase"))
+OLLAMA_EVAL_RATE = registry.histogram("earnings_ollama_eval_tokens_per_second", "Generation speed reported by Ollama per call", ("model",), RATE_BUCKETS)
+HTTP_SECONDS = registry.histogram("earnings_http_request_seconds", "Flask request handling time by route and status", ("route", "method", "status"))
+CACHE_ENTRIES = registry.gauge("earnings_response_cache_entries", "Entries in the LLM response cache")
+CACHE_BYTES = registry.gauge("earnings_response_cache_bytes", "Bytes of response text in the LLM response cache")
+
+# Record a finished span on the global histogram and, when a tracker is given, on that job's timing breakdown
+def observe_span(name: str, seconds: float, progress=None):
+    SPAN_SECONDS.observe(seconds, span=name)
+    if progress is not None:
+        progress.record_timing(name, seconds)
+
+@contextmanager
+def span(name: str, progress=None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_span(name, time.perf_counter() - started, progress)
+
+# Decorator form of span() for functions that have no tracker to report to
+def timed(name: str):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# Fold the stats Ollama returns with a generation (durations in nanoseconds) into the counters
+def record_generation(model: str, stats: Dict, progress=None):
+    OLLAMA_TOKENS.inc(stats.get("prompt_eval_count", 0), model=model, kind="prompt")
+    OLLAMA_TOKENS.inc(stats.get("eval_count", 0), model=model, kind="eval")
+    for phase in ("load", "prompt_eval", "eval", "total"):
+        OLLAMA_SECONDS.inc(stats.get(f"{phase}_duration", 0) / 1e9, model=model, phase=phase)
+    if stats.get("eval_count") and stats.get("eval_duration"):
+        OLLAMA_EVAL_RATE.observe(stats["eval_count"] / (stats["eval_duration"] / 1e9), model=model)
+    if progress is not None:
+        progress.record_generation(stats)
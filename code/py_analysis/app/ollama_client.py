@@ -0,0 +1,216 @@
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "600"))
+OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "3"))
+OLLAMA_BACKOFF_BASE = float(os.getenv("OLLAMA_BACKOFF_BASE", "1"))
+OLLAMA_BACKOFF_MAX = float(os.getenv("OLLAMA_BACKOFF_MAX", "30"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_BREAKER_THRESHOLD = int(os.getenv("OLLAMA_BREAKER_THRESHOLD", "5"))
+OLLAMA_BREAKER_RESET = float(os.getenv("OLLAMA_BREAKER_RESET", "30"))
+
+# Status codes worth retrying: overload, rate limiting and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Stats Ollama returns alongside a completed generation
+STAT_FIELDS = ("total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration")
+
+class OllamaError(RuntimeError):
+    pass
+
+# Raised without contacting the server while the circuit breaker is open
+class OllamaUnavailable(OllamaError):
+    pass
+
+class _RetryableError(OllamaError):
+    pass
+
+# Opens after consecutive failures so callers fail fast while Ollama is down, then lets one probe through
+class CircuitBreaker:
+    def __init__(self, threshold: int = OLLAMA_BREAKER_THRESHOLD, reset_after: float = OLLAMA_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_after:
+                raise OllamaUnavailable("Ollama circuit breaker is open; skipping call")
+            # Half-open: re-arm the timer so only this caller probes until it succeeds or fails
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+# Pooled, resilient client for Ollama's /api/generate and /api/embed endpoints
+class OllamaClient:
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 4,
+        connect_timeout: float = OLLAMA_CONNECT_TIMEOUT,
+        read_timeout: float = OLLAMA_READ_TIMEOUT,
+        max_retries: int = OLLAMA_MAX_RETRIES,
+        keep_alive: Optional[str] = OLLAMA_KEEP_ALIVE,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.url = url
+        self.embed_url = url.rsplit("/api/", 1)[0] + "/api/embed"
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.keep_alive = keep_alive
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        self.resize_pool(pool_size)
+
+    # Keep one pooled connection per concurrent caller so connections are reused rather than discarded
+    def resize_pool(self, pool_size: int):
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _payload(self, model: str, prompt: str, options: Optional[Dict], keep_alive: Optional[str], stream: bool, format: Optional[str] = None) -> Dict:
+        payload = {"model": model, "prompt": prompt, "stream": stream}
+        if options:
+            payload["options"] = options
+        if format:
+            payload["format"] = format
+        keep_alive = self.keep_alive if keep_alive is None else keep_alive
+        if keep_alive:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    # Generate a completion and return {"response": text, **stats}; retries transient failures with jittered backoff.
+    # format="json" constrains the output to a JSON value.
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        options: Optional[Dict] = None,
+        keep_alive: Optional[str] = None,
+        stream: bool = False,
+        on_partial: Optional[Callable[[str], None]] = None,
+        partial_interval: float = 0.25,
+        format: Optional[str] = None,
+    ) -> Dict:
+        payload = self._payload(model, prompt, options, keep_alive, stream, format)
+        if stream:
+            return self._with_retries(lambda: self._generate_stream(payload, on_partial, partial_interval))
+        return self._with_retries(lambda: self._generate_once(payload))
+
+    # Embed a batch of texts in one request; returns one vector per text, in order
+    def embed(self, model: str, texts: List[str], keep_alive: Optional[str] = None) -> List[List[float]]:
+        payload = {"model": model, "input": list(texts)}
+        keep_alive = self.keep_alive if keep_alive is None else keep_alive
+        if keep_alive:
+            payload["keep_alive"] = keep_alive
+        return self._with_retries(lambda: self._embed_once(payload))
+
+    # Run one request through the circuit breaker, retrying transient failures with jittered backoff
+    def _with_retries(self, call: Callable[[], object]):
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = call()
+                self.breaker.record_success()
+                return result
+            except (requests.ConnectionError, requests.Timeout, _RetryableError) as e:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise OllamaError(f"Ollama request failed after {attempt + 1} attempts: {e}") from e
+                delay = random.uniform(0, min(OLLAMA_BACKOFF_MAX, OLLAMA_BACKOFF_BASE * 2 ** attempt))
+                print(f"[WARN] Ollama call failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def _check_status(self, response: requests.Response):
+        if response.status_code in RETRYABLE_STATUS:
+            raise _RetryableError(f"HTTP {response.status_code}: {response.text[:200]}")
+        response.raise_for_status()
+
+    def _generate_once(self, payload: Dict) -> Dict:
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        self._check_status(response)
+        try:
+            body = response.json()
+        except ValueError as e:
+            raise OllamaError(f"Failed to parse Ollama response: {e}") from e
+
+        content = body.get("response") or body.get("message", {}).get("content") or ""
+        return {"response": content, **{field: body[field] for field in STAT_FIELDS if field in body}}
+
+    def _embed_once(self, payload: Dict) -> List[List[float]]:
+        response = self.session.post(self.embed_url, json=payload, timeout=self.timeout)
+        self._check_status(response)
+        try:
+            embeddings = response.json()["embeddings"]
+        except (ValueError, KeyError) as e:
+            raise OllamaError(f"Failed to parse Ollama embeddings: {e}") from e
+        if len(embeddings) != len(payload["input"]):
+            raise OllamaError(f"Ollama returned {len(embeddings)} embeddings for {len(payload['input'])} inputs")
+        return embeddings
+
+    # Parsed events of an NDJSON stream. A connection dropped mid-generation or a truncated or garbled line is
+    # raised as retryable, like any other transient failure.
+    def _stream_events(self, response: requests.Response):
+        try:
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+        except (ValueError, requests.exceptions.ChunkedEncodingError) as e:
+            raise _RetryableError(f"Ollama stream broke off: {e}") from e
+
+    # Consume the NDJSON token stream, forwarding accumulated text at most every partial_interval seconds
+    def _generate_stream(self, payload: Dict, on_partial: Optional[Callable[[str], None]], partial_interval: float) -> Dict:
+        parts, last_emit, final = [], 0.0, None
+
+        with self.session.post(self.url, json=payload, timeout=self.timeout, stream=True) as response:
+            self._check_status(response)
+            for event in self._stream_events(response):
+                if event.get("error"):
+                    raise OllamaError(f"Ollama stream error: {event['error']}")
+
+                parts.append(event.get("response") or event.get("message", {}).get("content") or "")
+                done = bool(event.get("done"))
+
+                now = time.monotonic()
+                if on_partial is not None and (done or now - last_emit >= partial_interval):
+                    on_partial("".join(parts))
+                    last_emit = now
+                if done:
+                    final = event
+                    break
+
+        # Only a stream that reached its final "done" event is a complete generation
+        if final is None:
+            raise _RetryableError("Ollama stream ended before the generation completed")
+        return {"response": "".join(parts), **{field: final[field] for field in STAT_FIELDS if field in final}}
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Iterable, List
+
+from app.cache import SqliteStore
+
+# Hash the JSON form of a node's inputs; dependency fingerprints are passed in as plain strings
+def fingerprint(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# SQLite record of each stage node's input fingerprint and output, per company and quarter
+class StageStore(SqliteStore):
+    def __init__(self, path: str):
+        super().__init__(path, """
+            CREATE TABLE IF NOT EXISTS stages (
+                company TEXT NOT NULL,
+                quarter TEXT NOT NULL,
+                node TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                output TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (company, quarter, node)
+            )
+        """)
+
+    # Load every node record for a quarter in one query
+    def load(self, company: str, quarter: str) -> Dict[str, tuple]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT node, fingerprint, output FROM stages WHERE company = ? AND quarter = ?",
+                (company, quarter)
+            ).fetchall()
+        return {node: (fp, json.loads(output)) for node, fp, output in rows}
+
+    def save(self, company: str, quarter: str, node: str, fp: str, output: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stages (company, quarter, node, fingerprint, output, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (company, quarter, node, fp, json.dumps(output, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    # Drop records for nodes that no longer exist in the graph (e.g. a section now has fewer chunks)
+    def prune(self, company: str, quarter: str, keep: Iterable[str]):
+        keep = set(keep)
+        with self._lock:
+            nodes = [row[0] for row in self._conn.execute(
+                "SELECT node FROM stages WHERE company = ? AND quarter = ?", (company, quarter)
+            )]
+            stale = [(company, quarter, node) for node in nodes if node not in keep]
+            self._conn.executemany("DELETE FROM stages WHERE company = ? AND quarter = ? AND node = ?", stale)
+            self._conn.commit()
+
+# One run of a quarter's stage graph: clean nodes reuse their recorded output, dirty nodes recompute
+class StageRun:
+    def __init__(self, store: StageStore, company: str, quarter: str):
+        self.store = store
+        self.company = company
+        self.quarter = quarter
+        self.records = store.load(company, quarter)
+        self.fingerprints: Dict[str, str] = {}
+        self.recomputed: List[str] = []
+        self.reused: List[str] = []
+        self._lock = threading.Lock()
+
+    def is_clean(self, name: str, fp: str) -> bool:
+        record = self.records.get(name)
+        return record is not None and record[0] == fp
+
+    def _finish(self, name: str, fp: str, output: Any, recomputed: bool) -> Any:
+        with self._lock:
+            self.fingerprints[name] = fp
+            (self.recomputed if recomputed else self.reused).append(name)
+        if recomputed:
+            self.store.save(self.company, self.quarter, name, fp, output)
+        return output
+
+    # Evaluate a node inline: reuse the stored output when its input fingerprint is unchanged
+    def node(self, name: str, fp: str, compute: Callable[[], Any]) -> Any:
+        if self.is_clean(name, fp):
+            return self._finish(name, fp, self.records[name][1], recomputed=False)
+        return self._finish(name, fp, compute(), recomputed=True)
+
+    # Same as node(), but dirty nodes run on the given executor; clean nodes resolve immediately
+    def submit(self, executor: Executor, name: str, fp: str, compute: Callable[[], Any]) -> Future:
+        if self.is_clean(name, fp):
+            future = Future()
+            future.set_result(self._finish(name, fp, self.records[name][1], recomputed=False))
+            return future
+        return executor.submit(lambda: self._finish(name, fp, compute(), recomputed=True))
+
+    # Forget nodes from earlier runs that this run did not visit, and report what was recomputed
+    def finish(self) -> Dict:
+        self.store.prune(self.company, self.quarter, self.fingerprints)
+        return {
+            "recomputed": sorted(self.recomputed),
+            "reused": len(self.reused),
+        }
@@ -0,0 +1,248 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+PROGRESS_HISTORY_LIMIT = 200
+
+# Live progress for one job: per-quarter stage, chunk counts, cache hits vs LLM calls and stage timings
+class ProgressTracker:
+    def __init__(self, job_id: str, company: str = None):
+        self.job_id = job_id
+        self.company = company
+        self.status = "queued"
+        self.message = "Queued"
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.version = 0
+        self.quarters: Dict[str, Dict] = {}
+        # Tone comparisons are tracked apart from quarters, keyed by "<quarter1>_vs_<quarter2>"
+        self.comparisons: Dict[str, Dict] = {}
+        # Streamed text per (scope, key, node): {"text", "version", "done"}; finished nodes keep their final text
+        # so stream clients get it once, but snapshots only repeat what changed since the client's version
+        self._partials: Dict[Tuple[str, str, str], Dict] = {}
+        self.timings: Dict[str, Dict] = {}
+        # Wall-clock seconds per analyzed quarter; kept out of results so repeat responses stay byte-identical
+        self.quarter_seconds: Dict[str, float] = {}
+        self.ollama = {"calls": 0, "prompt_eval_count": 0, "eval_count": 0, "prompt_eval_seconds": 0.0, "eval_seconds": 0.0, "total_seconds": 0.0}
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def _quarter(self, quarter: str) -> Dict:
+        entry = self.quarters.get(quarter)
+        if entry is None:
+            entry = self.quarters[quarter] = {
+                "stage": None,
+                "chunks_done": 0,
+                "chunks_total": 0,
+                "cache_hits": 0,
+                "llm_calls": 0,
+                "stages": {},
+            }
+        return entry
+
+    def _comparison(self, comparison: str) -> Dict:
+        entry = self.comparisons.get(comparison)
+        if entry is None:
+            entry = self.comparisons[comparison] = {"cache_hits": 0, "llm_calls": 0}
+        return entry
+
+    def _entry(self, scope: str, key: str) -> Dict:
+        return self._comparison(key) if scope == "comparisons" else self._quarter(key)
+
+    # Apply a mutation under the lock, bump the version and wake any stream waiters
+    def _update(self, fn):
+        with self._cond:
+            fn()
+            self.version += 1
+            self.updated_at = time.time()
+            self._cond.notify_all()
+
+    def set_message(self, message: str):
+        def apply():
+            self.message = message
+            if self.status == "queued":
+                self.status = "running"
+        self._update(apply)
+
+    # Close the current stage's timer for a quarter and start the next one
+    def start_stage(self, quarter: str, stage: str):
+        def apply():
+            entry = self._quarter(quarter)
+            now = time.time()
+            previous = entry["stages"].get(entry["stage"])
+            if previous and previous["elapsed"] is None:
+                previous["elapsed"] = round(now - previous["started_at"], 3)
+            entry["stage"] = stage
+            if stage != "done":
+                entry["stages"][stage] = {"started_at": now, "elapsed": None}
+            if self.status == "queued":
+                self.status = "running"
+        self._update(apply)
+
+    def set_chunks(self, quarter: str, total: int):
+        def apply():
+            entry = self._quarter(quarter)
+            entry["chunks_total"] = total
+            entry["chunks_done"] = 0
+        self._update(apply)
+
+    def _increment(self, quarter: str, field: str, scope: str = "quarters"):
+        def apply():
+            self._entry(scope, quarter)[field] += 1
+        self._update(apply)
+
+    def chunk_done(self, quarter: str):
+        self._increment(quarter, "chunks_done")
+
+    # Count a response as served from cache or generated by the model
+    def record_call(self, quarter: str, cached: bool, scope: str = "quarters"):
+        self._increment(quarter, "cache_hits" if cached else "llm_calls", scope)
+
+    # Latest streamed text for an in-flight generation, keyed by node name
+    def set_partial(self, quarter: str, name: str, text: str, scope: str = "quarters"):
+        def apply():
+            self._entry(scope, quarter)
+            self._partials[(scope, quarter, name)] = {"text": text, "version": self.version + 1, "done": False}
+        self._update(apply)
+
+    # Mark a streamed generation finished with its final text (None drops it, e.g. after a failed call);
+    # nodes that never streamed are left alone
+    def end_partial(self, quarter: str, name: str, text: Optional[str], scope: str = "quarters"):
+        def apply():
+            if (scope, quarter, name) not in self._partials:
+                return
+            if text is None:
+                del self._partials[(scope, quarter, name)]
+            else:
+                self._partials[(scope, quarter, name)] = {"text": text, "version": self.version + 1, "done": True}
+        self._update(apply)
+
+    # Streamed text changed after `since`, grouped as {scope: {key: {"partials": in flight, "completed": finished}}}.
+    # With since=None only in-flight generations are listed.
+    def _partials_since(self, since: Optional[int]) -> Dict:
+        grouped = {"quarters": {}, "comparisons": {}}
+        for (scope, key, name), partial in self._partials.items():
+            if since is None and partial["done"] or since is not None and partial["version"] <= since:
+                continue
+            entry = grouped[scope].setdefault(key, {"partials": {}, "completed": {}})
+            entry["completed" if partial["done"] else "partials"][name] = partial["text"]
+        return grouped
+
+    # Accumulate time spent in a named span; no version bump, so stream clients are not woken for every span
+    def record_timing(self, name: str, seconds: float):
+        with self._cond:
+            entry = self.timings.setdefault(name, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += seconds
+
+    def record_quarter_time(self, quarter: str, seconds: float):
+        with self._cond:
+            self.quarter_seconds[quarter] = seconds
+
+    # Accumulate the token counts and durations (nanoseconds) Ollama reported for one generation
+    def record_generation(self, stats: Dict):
+        with self._cond:
+            self.ollama["calls"] += 1
+            for field in ("prompt_eval_count", "eval_count"):
+                self.ollama[field] += stats.get(field, 0)
+            for phase in ("prompt_eval", "eval", "total"):
+                self.ollama[f"{phase}_seconds"] += stats.get(f"{phase}_duration", 0) / 1e9
+
+    # Per-span totals plus Ollama-reported work, i.e. where this job's wall-clock time went
+    def timing_breakdown(self) -> Dict:
+        with self._cond:
+            return {
+                "spans": {name: {"count": t["count"], "seconds": round(t["seconds"], 4)} for name, t in sorted(self.timings.items())},
+                "quarters": {quarter: round(seconds, 3) for quarter, seconds in self.quarter_seconds.items()},
+                "ollama": {field: round(value, 4) if isinstance(value, float) else value for field, value in self.ollama.items()},
+            }
+
+    def finish(self, status: str = "done", error: str = None):
+        def apply():
+            self.status = status
+            self.error = error
+            self.message = "Finished" if status == "done" else f"Failed: {error}"
+        self._update(apply)
+
+    # Block until the version moves past the one a client last saw, or the timeout expires
+    def wait_for_update(self, version: int, timeout: float) -> int:
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version or self.finished, timeout)
+            return self.version
+
+    # Current state of the job. Streamed text is limited to in-flight generations, or with `since` (a version the
+    # client already has) to text that changed after it, so stream events do not resend finished nodes.
+    def snapshot(self, since: Optional[int] = None) -> Dict:
+        with self._cond:
+            streamed = self._partials_since(since)
+            empty = {"partials": {}, "completed": {}}
+            quarters = {
+                quarter: {
+                    **entry,
+                    "stages": {name: dict(stage) for name, stage in entry["stages"].items()},
+                    **streamed["quarters"].get(quarter, empty),
+                }
+                for quarter, entry in self.quarters.items()
+            }
+            comparisons = {
+                comparison: {**entry, **streamed["comparisons"].get(comparison, empty)}
+                for comparison, entry in self.comparisons.items()
+            }
+            calls = list(quarters.values()) + list(comparisons.values())
+            return {
+                "job_id": self.job_id,
+                "company": self.company,
+                "status": self.status,
+                "message": self.message,
+                "error": self.error,
+                "version": self.version,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+                "quarters": quarters,
+                "comparisons": comparisons,
+                "totals": {
+                    "chunks_done": sum(q["chunks_done"] for q in quarters.values()),
+                    "chunks_total": sum(q["chunks_total"] for q in quarters.values()),
+                    "cache_hits": sum(c["cache_hits"] for c in calls),
+                    "llm_calls": sum(c["llm_calls"] for c in calls),
+                },
+                "timings": self.timing_breakdown(),
+            }
+
+# In-memory registry of job trackers plus the latest status line for the legacy /progress route
+class ProgressRegistry:
+    def __init__(self, history_limit: int = PROGRESS_HISTORY_LIMIT):
+        self.history_limit = history_limit
+        self.status = {"status": "Starting up...", "timestamp": time.time()}
+        self._lock = threading.Lock()
+        self._trackers: Dict[str, ProgressTracker] = {}
+
+    def get_or_create(self, job_id: str, company: str = None) -> ProgressTracker:
+        with self._lock:
+            tracker = self._trackers.get(job_id)
+            if tracker is None:
+                tracker = self._trackers[job_id] = ProgressTracker(job_id, company)
+                self._trim_history()
+            elif company and tracker.company is None:
+                tracker.company = company
+            return tracker
+
+    def get(self, job_id: str) -> Optional[ProgressTracker]:
+        with self._lock:
+            return self._trackers.get(job_id)
+
+    def set_status(self, message: str):
+        self.status = {"status": message, "timestamp": time.time()}
+
+    def _trim_history(self):
+        overflow = len(self._trackers) - self.history_limit
+        if overflow <= 0:
+            return
+        for job_id in [t.job_id for t in self._trackers.values() if t.finished][:overflow]:
+            del self._trackers[job_id]
+
+progress_registry = ProgressRegistry()
@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from app.metrics import registry
+
+# Pipeline stages that can each run on their own model
+STAGES = ("chunk_analysis", "section_summary", "strategic_summary", "overall_summary", "tone_compare")
+
+# Per-stage overrides from the environment, e.g. OLLAMA_MODEL_CHUNK_ANALYSIS=mistral and
+# OLLAMA_OPTIONS_OVERALL_SUMMARY='{"num_ctx": 8192}' (merged over OLLAMA_OPTIONS)
+STAGE_MODELS = {stage: os.getenv(f"OLLAMA_MODEL_{stage.upper()}") for stage in STAGES if os.getenv(f"OLLAMA_MODEL_{stage.upper()}")}
+STAGE_OPTIONS = {stage: json.loads(os.getenv(f"OLLAMA_OPTIONS_{stage.upper()}")) for stage in STAGES if os.getenv(f"OLLAMA_OPTIONS_{stage.upper()}")}
+# Models Ollama keeps loaded at once (its own OLLAMA_MAX_LOADED_MODELS); calls for other models wait their turn
+OLLAMA_MAX_LOADED_MODELS = max(1, int(os.getenv("OLLAMA_MAX_LOADED_MODELS", "1")))
+
+MODEL_SWITCHES = registry.counter("earnings_model_switches_total", "Times the model gate admitted a model that had no calls in flight", ("model",))
+
+class ModelSpecError(ValueError):
+    pass
+
+# Parse "chunk_analysis=mistral,overall_summary=mixtral" (or the same as a dict) into stage -> model
+def parse_stage_models(spec) -> Dict[str, str]:
+    if not spec:
+        return {}
+    if not isinstance(spec, (str, dict)):
+        raise ModelSpecError("models must be a STAGE=MODEL,... string or an object of stage to model")
+    items = spec.items() if isinstance(spec, dict) else (item.split("=", 1) if "=" in item else (item, "") for item in spec.split(","))
+    models = {}
+    for stage, model in items:
+        stage, model = stage.strip(), str(model).strip()
+        if stage not in STAGES:
+            raise ModelSpecError(f"Unknown stage {stage!r}; expected one of {', '.join(STAGES)}")
+        if not model:
+            raise ModelSpecError(f"No model given for stage {stage!r}; expected STAGE=MODEL")
+        models[stage] = model
+    return models
+
+# Model and options for every stage: a per-request stage model wins over the environment's, and stages without
+# one use the request's (or the global) default model
+def resolve_routes(default_model: str, default_options: Dict, models: Optional[Dict[str, str]] = None) -> Dict[str, Tuple[str, Dict]]:
+    models = models or {}
+    return {
+        stage: (models.get(stage) or STAGE_MODELS.get(stage) or default_model, {**default_options, **STAGE_OPTIONS.get(stage, {})})
+        for stage in STAGES
+    }
+
+# Admits live generations for at most max_models models at a time. Calls for a model that is already running are
+# let straight through, so concurrent quarters drain one model's work before Ollama is asked to swap to the next.
+class ModelGate:
+    def __init__(self, max_models: int = OLLAMA_MAX_LOADED_MODELS):
+        self.max_models = max_models
+        self.switches = 0
+        self._in_flight: Dict[str, int] = {}
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def hold(self, model: str):
+        with self._cond:
+            while model not in self._in_flight and len(self._in_flight) >= self.max_models:
+                self._cond.wait()
+            if model not in self._in_flight:
+                self._in_flight[model] = 0
+                self.switches += 1
+                MODEL_SWITCHES.inc(model=model)
+            self._in_flight[model] += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight[model] -= 1
+                if not self._in_flight[model]:
+                    del self._in_flight[model]
+                    self._cond.notify_all()
@@ -0,0 +1,171 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List
+
+from app.chunking import split_speaker_turns
+
+LEXICON_PATH = os.getenv("LEXICON_PATH")
+# Bump when scoring rules change so recorded chunk scores are recomputed
+SCORER_VERSION = "2"
+
+# Weighted term categories; each distinct term found in a chunk adds its category weight once
+DEFAULT_LEXICON = {
+    "categories": {
+        "strategy": {
+            "label": "strategy terms",
+            "weight": 1,
+            "terms": [
+                "ai", "training", "inference", "data center", "cloud", "enterprise", "gross margin", "supply chain",
+                "export", "regulation", "autonomous", "sovereign", "robotics", "simulation", "digital twin",
+                "infrastructure", "platform", "ecosystem", "open source", "scaling", "monetization", "networking",
+                "demand", "growth", "revenue", "market", "segment", "margin", "tariff", "customers", "csp",
+                "cost", "throughput", "ramp", "manufacturing"
+            ],
+        },
+        "financial": {
+            "label": "financial cues",
+            "weight": 1,
+            "terms": ["revenue", "guidance", "fiscal", "quarter", "sequential", "yoy", "qoq", "dollars", "billion"],
+        },
+        "tone": {
+            "label": "tone cues",
+            "weight": 1,
+            "terms": ["confident", "excited", "optimistic", "cautious", "challenging", "strong", "headwinds", "visibility"],
+        },
+    },
+    # Any executive mention adds a flat bonus rather than a per-term weight
+    "exec_weight": 2,
+    "exec_names": ["cfo", "ceo", "chief executive officer", "chief financial officer"],
+}
+
+# Company-specific additions merged on top of the default lexicon
+COMPANY_LEXICONS = {
+    "nvidia": {
+        "exec_names": ["jensen huang", "colette kress"],
+    },
+}
+
+OPERATOR_PATTERN = re.compile(r"^operator(?:[\s,:]|$)")
+OPERATOR_PHRASES = ("conference operator", "all lines have been placed on mute")
+
+# An operator turn is call logistics: it opens with "Operator" or carries the usual housekeeping phrases
+def _is_operator_turn(turn: List[str]) -> bool:
+    text = "\n".join(turn).lower()
+    return bool(OPERATOR_PATTERN.match(text)) or any(phrase in text for phrase in OPERATOR_PHRASES)
+
+# Merge a company's overrides into the default lexicon; category terms and exec names are unioned
+def _merge_lexicon(base: Dict, extra: Dict) -> Dict:
+    merged = json.loads(json.dumps(base))
+    for name, category in extra.get("categories", {}).items():
+        target = merged["categories"].setdefault(name, {"label": f"{name} terms", "weight": 1, "terms": []})
+        target["terms"] = list(dict.fromkeys(target["terms"] + category.get("terms", [])))
+        for field in ("label", "weight"):
+            if field in category:
+                target[field] = category[field]
+    merged["exec_names"] = list(dict.fromkeys(merged["exec_names"] + extra.get("exec_names", [])))
+    if "exec_weight" in extra:
+        merged["exec_weight"] = extra["exec_weight"]
+    return merged
+
+# Load per-company lexicons from LEXICON_PATH (a JSON object keyed by company) on top of the built-ins
+def load_company_lexicons(path: str = LEXICON_PATH) -> Dict:
+    lexicons = dict(COMPANY_LEXICONS)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for company, extra in json.load(f).items():
+                lexicons[company.lower()] = _merge_lexicon({"categories": {}, "exec_names": [], **lexicons.get(company.lower(), {})}, extra)
+    return lexicons
+
+def _term_pattern(term: str) -> str:
+    # Whole words only, tolerant of line breaks inside multi-word terms and of a plural "s"
+    return r"\s+".join(re.escape(word) for word in term.split()) + "s?"
+
+# Single-pass matcher compiled once per lexicon: one word-boundary alternation over every term
+class ChunkScorer:
+    def __init__(self, lexicon: Dict):
+        self.lexicon = lexicon
+        self.exec_weight = lexicon.get("exec_weight", 2)
+        self.categories = lexicon["categories"]
+
+        # Map each term to the categories it counts toward (a term may belong to several)
+        self.term_categories: Dict[str, List[str]] = {}
+        for name, category in self.categories.items():
+            for term in category["terms"]:
+                self.term_categories.setdefault(term.lower(), []).append(name)
+        self.exec_names = {name.lower() for name in lexicon.get("exec_names", [])}
+
+        terms = sorted(set(self.term_categories) | self.exec_names, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(" + "|".join(_term_pattern(t) for t in terms) + r")\b")
+
+        # A longer match ("gross margin") also counts the shorter terms it contains ("margin")
+        self.contained = {
+            term: {other for other in terms if other != term and re.search(r"\b" + _term_pattern(other) + r"\b", term)}
+            for term in terms
+        }
+
+    def _canonical(self, match: str) -> str:
+        term = " ".join(match.split())
+        if term in self.term_categories or term in self.exec_names:
+            return term
+        return term[:-1]
+
+    # Score one chunk on its non-operator turns; a chunk that is only operator logistics scores zero
+    def score(self, chunk_text: str) -> dict:
+        content = [turn for turn in split_speaker_turns(chunk_text) if not _is_operator_turn(turn)]
+        text = "\n".join(line for turn in content for line in turn).lower()
+        if not content:
+            return {
+                "score": 0,
+                "tag": "operator_logistics",
+                "reason": "Procedural intro — not exec content"
+            }
+
+        found = set()
+        for match in self.pattern.finditer(text):
+            term = self._canonical(match.group(1))
+            found.add(term)
+            found.update(self.contained.get(term, ()))
+
+        mentions_exec = bool(found & self.exec_names)
+        counts = {name: sum(1 for term in found if name in self.term_categories.get(term, ())) for name in self.categories}
+
+        score = (self.exec_weight if mentions_exec else 0) + sum(
+            counts[name] * category.get("weight", 1) for name, category in self.categories.items()
+        )
+        tag = "high" if score >= 6 else "medium" if score >= 3 else "low"
+        reason = ", ".join(f"{counts[name]} {category.get('label', name)}" for name, category in self.categories.items())
+
+        return {
+            "score": score,
+            "tag": tag,
+            "reason": f"{'Exec mentioned. ' if mentions_exec else ''}{reason}"
+        }
+
+    # Batch API: score every chunk of a transcript with the same compiled matcher
+    def score_many(self, chunks: Iterable[str]) -> List[dict]:
+        return [self.score(chunk) for chunk in chunks]
+
+_scorers: Dict[str, ChunkScorer] = {}
+_scorers_lock = threading.Lock()
+_company_lexicons = None
+
+# Return the compiled scorer for a company, building it on first use
+def get_scorer(company: str = "NVIDIA") -> ChunkScorer:
+    global _company_lexicons
+    key = (company or "").lower()
+    with _scorers_lock:
+        scorer = _scorers.get(key)
+        if scorer is None:
+            if _company_lexicons is None:
+                _company_lexicons = load_company_lexicons()
+            scorer = _scorers[key] = ChunkScorer(_merge_lexicon(DEFAULT_LEXICON, _company_lexicons.get(key, {})))
+        return scorer
+
+def score_chunks(chunks: Iterable[str], company: str = "NVIDIA") -> List[dict]:
+    return get_scorer(company).score_many(chunks)
+
+# Score many transcripts at once: {transcript_id: (company, chunks)} -> {transcript_id: [scores]}
+def score_transcripts(transcripts: Dict[str, tuple]) -> Dict[str, List[dict]]:
+    return {key: score_chunks(chunks, company) for key, (company, chunks) in transcripts.items()}
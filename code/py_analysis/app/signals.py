@@ -0,0 +1,335 @@
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.cache import SqliteStore
+from app.summaries import quarter_sort_key
+
+# Ask Ollama for JSON (format=json) on chunk and summary prompts and index the parsed signals
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "true").lower() in ("1", "true", "yes")
+
+SENTIMENT_SCORES = {"positive": 1, "neutral": 0, "negative": -1}
+# Section records are keyed by the result field they come from; "overall" is the quarter's overall summary
+SECTIONS = ("management_sentiment", "qa_sentiment", "strategic_focuses", "overall")
+TERM_KINDS = ("tone", "theme", "concern")
+
+# Appended to every structured prompt; "summary" carries the written analysis the prompt asks for
+SIGNAL_FORMAT_INSTRUCTIONS = """
+
+Respond with a single JSON object and nothing else, using exactly these keys:
+{"sentiment": "Positive, Neutral or Negative", "tone": ["one or two words each, e.g. confident"], "themes": ["short title of each strategic theme discussed"], "concerns": ["each risk or concern raised, e.g. export regulation"], "summary": "the full written analysis requested above"}
+"""
+
+SENTIMENT_PATTERN = re.compile(r"\b(positive|neutral|negative)\b", re.IGNORECASE)
+
+# One analysis parsed from a model response; `structured` is False when the response was not the requested JSON
+@dataclass
+class Signal:
+    sentiment: Optional[str] = None
+    tone: List[str] = field(default_factory=list)
+    themes: List[str] = field(default_factory=list)
+    concerns: List[str] = field(default_factory=list)
+    summary: str = ""
+    structured: bool = True
+
+    @property
+    def score(self) -> Optional[int]:
+        return SENTIMENT_SCORES.get((self.sentiment or "").lower())
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+def _strings(value) -> List[str]:
+    if isinstance(value, str):
+        value = re.split(r"[;,\n]", value)
+    if not isinstance(value, list):
+        return []
+    seen, items = set(), []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get("title") or item.get("name") or next(iter(item.values()), "")
+        text = " ".join(str(item).split()).strip(" .-")
+        if text and text.lower() not in seen:
+            seen.add(text.lower())
+            items.append(text)
+    return items
+
+def _sentiment(value) -> Optional[str]:
+    match = SENTIMENT_PATTERN.search(str(value or ""))
+    return match.group(1).capitalize() if match else None
+
+SIGNAL_KEYS = ("sentiment", "tone", "themes", "concerns", "summary")
+
+# JSON object in a response: the whole text, or (when the model wrapped it in prose or code fences) the first "{"
+# that decodes to an object with signal keys, else the first that decodes to any object
+def _json_object(text: str) -> Optional[Dict]:
+    try:
+        body = json.loads(text)
+        return body if isinstance(body, dict) else None
+    except ValueError:
+        pass
+    decoder, fallback = json.JSONDecoder(), None
+    start = text.find("{")
+    while start >= 0:
+        try:
+            body, end = decoder.raw_decode(text, start)
+        except ValueError:
+            start = text.find("{", start + 1)
+            continue
+        if isinstance(body, dict):
+            if any(key in body for key in SIGNAL_KEYS):
+                return body
+            if fallback is None:
+                fallback = body
+        start = text.find("{", end)
+    return fallback
+
+# Parse a response. Only responses to prompts that requested JSON (`structured`) are read as JSON; the rest, and a
+# JSON response that does not parse, are free text with the first sentiment label they mention.
+def parse_signal(text: str, structured: bool = True) -> Signal:
+    body = _json_object(text or "") if structured else None
+    if body is None:
+        if structured and text:
+            print(f"[WARN] Response requested as JSON did not parse; treating it as free text: {text[:80]!r}")
+        return Signal(sentiment=_sentiment(text), summary=(text or "").strip(), structured=False)
+
+    summary = body.get("summary") or ""
+    if not isinstance(summary, str):
+        summary = json.dumps(summary, ensure_ascii=False)
+    return Signal(
+        sentiment=_sentiment(body.get("sentiment")),
+        tone=_strings(body.get("tone")),
+        themes=_strings(body.get("themes")),
+        concerns=_strings(body.get("concerns")),
+        summary=summary.strip(),
+    )
+
+# Readable text for the UI and for prompts that consume an analysis; free-text responses pass through unchanged
+def render_signal(signal: Signal) -> str:
+    if not signal.structured:
+        return signal.summary
+    lines = []
+    if signal.sentiment:
+        lines.append(f"Sentiment: {signal.sentiment}")
+    if signal.tone:
+        lines.append(f"Tone: {', '.join(signal.tone)}")
+    parts = ["\n".join(lines)] if lines else []
+    if signal.summary:
+        parts.append(signal.summary)
+    for title, items in (("Themes", signal.themes), ("Concerns", signal.concerns)):
+        if items:
+            parts.append(f"{title}:\n" + "\n".join(f"- {item}" for item in items))
+    return "\n\n".join(parts)
+
+def present(text: str, structured: bool = True) -> str:
+    return render_signal(parse_signal(text, structured))
+
+# Close the strings, arrays and objects left open by a truncated JSON text
+def _close_json(text: str) -> str:
+    closers, in_string, escaped = [], False, False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]" and closers:
+            closers.pop()
+    if escaped:
+        text = text[:-1]
+    return text + ('"' if in_string else "") + "".join(reversed(closers))
+
+# Readable text for a JSON response that is still streaming: the fields received so far, with a half-written
+# value closed off, or with a dangling key dropped (cut back to the last comma) when closing alone does not parse
+def present_partial(text: str) -> str:
+    start = (text or "").find("{")
+    if start < 0:
+        return text or ""
+    body = text[start:]
+    while body:
+        try:
+            parsed = json.loads(_close_json(body))
+        except ValueError:
+            body = body[:max(0, body.rfind(","))]
+            continue
+        return present(json.dumps(parsed)) if isinstance(parsed, dict) else ""
+    return ""
+
+def _quarter_label(quarter: str) -> str:
+    return " ".join(quarter.upper().split())
+
+# SQLite index of parsed signals: one row per section summary or chunk analysis, plus one row per tone word,
+# theme and concern so trend and mention queries are plain indexed lookups
+class SignalStore(SqliteStore):
+    def __init__(self, path: str):
+        super().__init__(path, """
+            CREATE TABLE IF NOT EXISTS signals (
+                company TEXT NOT NULL,
+                quarter TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                period INTEGER NOT NULL,
+                section TEXT NOT NULL,
+                node TEXT NOT NULL,
+                model TEXT,
+                sentiment TEXT,
+                score INTEGER,
+                tone TEXT NOT NULL,
+                themes TEXT NOT NULL,
+                concerns TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (company, quarter, section, node)
+            );
+            CREATE INDEX IF NOT EXISTS signals_by_period ON signals (company, section, year, period);
+            CREATE TABLE IF NOT EXISTS signal_terms (
+                company TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                term TEXT NOT NULL,
+                quarter TEXT NOT NULL,
+                section TEXT NOT NULL,
+                node TEXT NOT NULL,
+                PRIMARY KEY (company, kind, term, quarter, section, node)
+            );
+            CREATE INDEX IF NOT EXISTS signal_terms_by_quarter ON signal_terms (company, quarter, section);
+        """)
+
+    # Replace every record of a quarter with the signals of its latest analysis
+    # records: (section, node, signal) where node is "summary" for a section or "chunk:<i>" for a chunk analysis
+    def put_quarter(self, company: str, quarter: str, model: str, records: List[Tuple[str, str, Signal]]):
+        company, quarter = company.lower(), _quarter_label(quarter)
+        year, period = quarter_sort_key(quarter)
+        now = time.time()
+        rows, terms = [], []
+        for section, node, signal in records:
+            rows.append((
+                company, quarter, year, period, section, node, model, signal.sentiment, signal.score,
+                json.dumps(signal.tone), json.dumps(signal.themes), json.dumps(signal.concerns), signal.summary, now
+            ))
+            for kind, items in (("tone", signal.tone), ("theme", signal.themes), ("concern", signal.concerns)):
+                terms += [(company, kind, item.lower(), quarter, section, node) for item in items]
+        with self._lock:
+            self._conn.execute("DELETE FROM signals WHERE company = ? AND quarter = ?", (company, quarter))
+            self._conn.execute("DELETE FROM signal_terms WHERE company = ? AND quarter = ?", (company, quarter))
+            self._conn.executemany("INSERT OR REPLACE INTO signals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.executemany("INSERT OR IGNORE INTO signal_terms VALUES (?, ?, ?, ?, ?, ?)", terms)
+            self._conn.commit()
+
+    # Quarter labels with signals for a company, oldest first
+    def quarters(self, company: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT quarter, year, period FROM signals WHERE company = ? ORDER BY year, period", (company.lower(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    # Sentiment per quarter for one section, oldest first, with the mean sentiment of the chunk analyses under it
+    # (both sections' chunks for "overall")
+    def trend(self, company: str, section: str = "overall") -> List[Dict]:
+        company = company.lower()
+        chunk_filter = "" if section == "overall" else "AND section = ?"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT quarter, sentiment, score, tone, themes, concerns FROM signals "
+                "WHERE company = ? AND section = ? AND node = 'summary' ORDER BY year, period",
+                (company, section)
+            ).fetchall()
+            chunk_rows = self._conn.execute(
+                f"SELECT quarter, AVG(score), COUNT(score), COUNT(*) FROM signals "
+                f"WHERE company = ? AND node LIKE 'chunk:%' {chunk_filter} GROUP BY quarter",
+                (company, section) if chunk_filter else (company,)
+            ).fetchall()
+        chunks = {quarter: (mean, rated, total) for quarter, mean, rated, total in chunk_rows}
+        trend = []
+        for quarter, sentiment, score, tone, themes, concerns in rows:
+            mean, rated, total = chunks.get(quarter, (None, 0, 0))
+            trend.append({
+                "quarter": quarter,
+                "sentiment": sentiment,
+                "score": score,
+                "tone": json.loads(tone),
+                "themes": len(json.loads(themes)),
+                "concerns": len(json.loads(concerns)),
+                "chunk_score": round(mean, 3) if mean is not None else None,
+                "chunks_rated": rated,
+                "chunks": total,
+            })
+        return trend
+
+    # Quarters whose tone words, themes or concerns contain the phrase (case-insensitive), or whose section
+    # summaries mention it, oldest first
+    def mentions(self, company: str, phrase: str, kinds: Tuple[str, ...] = TERM_KINDS, include_text: bool = True) -> List[Dict]:
+        company, pattern = company.lower(), f"%{phrase.lower().strip()}%"
+        kinds = tuple(kind for kind in kinds if kind in TERM_KINDS) or TERM_KINDS
+        with self._lock:
+            term_rows = self._conn.execute(
+                f"SELECT quarter, section, kind, term FROM signal_terms "
+                f"WHERE company = ? AND kind IN ({','.join('?' * len(kinds))}) AND term LIKE ?",
+                (company, *kinds, pattern)
+            ).fetchall()
+            text_rows = self._conn.execute(
+                "SELECT quarter, section FROM signals WHERE company = ? AND node = 'summary' AND LOWER(summary) LIKE ?",
+                (company, pattern)
+            ).fetchall() if include_text else []
+
+        found: Dict[str, Dict] = {}
+        for quarter, section, kind, term in term_rows:
+            entry = found.setdefault(quarter, {"quarter": quarter, "sections": set(), "terms": set(), "in_summary": set()})
+            entry["sections"].add(section)
+            entry["terms"].add(f"{kind}:{term}")
+        for quarter, section in text_rows:
+            entry = found.setdefault(quarter, {"quarter": quarter, "sections": set(), "terms": set(), "in_summary": set()})
+            entry["sections"].add(section)
+            entry["in_summary"].add(section)
+        return [
+            {**entry, "sections": sorted(entry["sections"]), "terms": sorted(entry["terms"]), "in_summary": sorted(entry["in_summary"])}
+            for entry in sorted(found.values(), key=lambda e: quarter_sort_key(e["quarter"]))
+        ]
+
+    def _section_signals(self, company: str, quarter: str) -> Dict[str, Signal]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT section, sentiment, tone, themes, concerns, summary FROM signals WHERE company = ? AND quarter = ? AND node = 'summary'",
+                (company.lower(), _quarter_label(quarter))
+            ).fetchall()
+        return {
+            section: Signal(sentiment, json.loads(tone), json.loads(themes), json.loads(concerns), summary)
+            for section, sentiment, tone, themes, concerns, summary in rows
+        }
+
+    # Tone shift between quarter pairs from the stored signals: sentiment change per section, and the tone words,
+    # themes and concerns that appear or disappear. Pairs with a quarter missing from the store are skipped.
+    def tone_shift(self, company: str, pairs: List[Tuple[str, str]]) -> List[Dict]:
+        shifts = []
+        for quarter1, quarter2 in pairs:
+            before, after = self._section_signals(company, quarter1), self._section_signals(company, quarter2)
+            if not before or not after:
+                print(f"[WARN] No stored signals for {quarter1} or {quarter2}, skipping...")
+                continue
+
+            sentiment = {}
+            for section in SECTIONS:
+                old, new = before.get(section), after.get(section)
+                if old is None or new is None:
+                    continue
+                change = new.score - old.score if new.score is not None and old.score is not None else None
+                sentiment[section] = {"from": old.sentiment, "to": new.sentiment, "change": change}
+
+            shift = {"from": quarter1, "to": quarter2, "sentiment": sentiment}
+            for key, attribute in (("tone", "tone"), ("themes", "themes"), ("concerns", "concerns")):
+                old = {item.lower(): item for signal in before.values() for item in getattr(signal, attribute)}
+                new = {item.lower(): item for signal in after.values() for item in getattr(signal, attribute)}
+                shift[key] = {
+                    "added": [new[k] for k in sorted(new.keys() - old.keys())],
+                    "dropped": [old[k] for k in sorted(old.keys() - new.keys())],
+                }
+            shifts.append(shift)
+        return shifts
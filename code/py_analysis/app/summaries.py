@@ -0,0 +1,115 @@
+import itertools
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.chunking import SENTENCE_SPLIT, approx_tokens, chars_per_token, chunk_token_budget
+
+SUMMARY_CACHE_SIZE = max(1, int(os.getenv("SUMMARY_CACHE_SIZE", "256")))
+# "hierarchical" condenses chunk analyses in batches when they do not fit one summary prompt; "flat" always sends them all
+SUMMARY_REDUCE = os.getenv("SUMMARY_REDUCE", "hierarchical").lower()
+# Most responses folded into one summary or reduce prompt
+SUMMARY_FAN_IN = max(2, int(os.getenv("SUMMARY_FAN_IN", "8")))
+# Most levels of intermediate reduction before the final summary takes whatever remains
+SUMMARY_MAX_DEPTH = max(0, int(os.getenv("SUMMARY_MAX_DEPTH", "4")))
+# Token budget for the responses in one prompt; 0 derives it from the model context like the chunk budget
+SUMMARY_BATCH_TOKENS = int(os.getenv("SUMMARY_BATCH_TOKENS", "0"))
+# Tokens added per response for its "N. " prefix and the blank line between responses
+RESPONSE_SEPARATOR_TOKENS = 2
+
+class PairSpecError(ValueError):
+    pass
+
+# Chronological sort key for labels like "Q3 2025"; unrecognized labels sort first
+def quarter_sort_key(quarter: str) -> Tuple[int, int]:
+    match = re.match(r"^\s*Q([1-4])\s+(\d{4})\s*$", quarter or "", re.IGNORECASE)
+    return (int(match.group(2)), int(match.group(1))) if match else (0, 0)
+
+# Quarter pairs to compare: "adjacent" (default), "all"/"matrix" (every earlier-later pair),
+# or an explicit list such as "Q1 2025:Q3 2025,Q2 2025:Q4 2025"
+def select_pairs(quarters: List[str], spec: str = None) -> List[Tuple[str, str]]:
+    ordered = sorted(dict.fromkeys(quarters), key=quarter_sort_key)
+    spec = (spec or "adjacent").strip()
+    if spec.lower() == "adjacent":
+        return list(zip(ordered, ordered[1:]))
+    if spec.lower() in ("all", "matrix"):
+        return list(itertools.combinations(ordered, 2))
+
+    known = {q.upper(): q for q in ordered}
+    pairs = []
+    for item in spec.split(","):
+        if ":" not in item:
+            raise PairSpecError(f"Invalid quarter pair {item.strip()!r}; expected FROM:TO, e.g. 'Q1 2025:Q3 2025'")
+        first, second = (part.strip().upper() for part in item.split(":", 1))
+        pairs.append((known.get(first, first), known.get(second, second)))
+    return pairs
+
+def summary_batch_budget(options: Optional[Dict] = None, model: str = None, prompt_suffix: str = "") -> int:
+    return SUMMARY_BATCH_TOKENS or chunk_token_budget(options, model, prompt_suffix)
+
+# Pack responses, in order, into batches of at most fan_in that each fit the token budget; a response that is
+# over budget on its own gets a batch to itself. Returns the indices of each batch's responses.
+def plan_reduce_batches(texts: List[str], budget: int, fan_in: int = SUMMARY_FAN_IN, model: str = None) -> List[List[int]]:
+    batches, current, used = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = approx_tokens(text, model) + RESPONSE_SEPARATOR_TOKENS
+        if current and (len(current) >= fan_in or used + tokens > budget):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+# Cut a response down to `tokens` (separator included) so it fits a prompt on its own, ending at a sentence
+# boundary when one falls in the second half of what is kept
+def fit_response(text: str, tokens: int, model: str = None) -> str:
+    limit = max(1, tokens - RESPONSE_SEPARATOR_TOKENS)
+    if approx_tokens(text, model) <= limit:
+        return text
+    cut = text[:int(limit * chars_per_token(model))]
+    sentences = SENTENCE_SPLIT.split(cut)
+    if len(sentences) > 1 and len(cut) - len(sentences[-1]) > len(cut) // 2:
+        cut = cut[:len(cut) - len(sentences[-1])]
+    return cut.rstrip()
+
+# In-process LRU of overall summaries per (company, quarter, model), fed by analyze_labeled_sections
+class SummaryStore:
+    def __init__(self, max_entries: int = SUMMARY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(company: str, quarter: str, model: str) -> tuple:
+        return (company.lower(), " ".join(quarter.upper().split()), model)
+
+    def put(self, company: str, quarter: str, model: str, summary: str):
+        key = self._key(company, quarter, model)
+        with self._lock:
+            self._entries[key] = {"quarter": quarter, "summary": summary}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, company: str, quarter: str, model: str) -> Optional[str]:
+        key = self._key(company, quarter, model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry["summary"]
+
+    # Quarter labels held for a company and model, oldest first
+    def quarters(self, company: str, model: str) -> List[str]:
+        with self._lock:
+            labels = [e["quarter"] for (c, _, m), e in self._entries.items() if c == company.lower() and m == model]
+        return sorted(labels, key=quarter_sort_key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
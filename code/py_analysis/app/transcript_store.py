@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.cache import SqliteStore
+from app.extraction import EXTRACTOR_VERSION
+from app.fool_scraper import fetch_transcript_html, parse_transcript_html
+
+TRANSCRIPT_FETCH_WORKERS = max(1, int(os.getenv("TRANSCRIPT_FETCH_WORKERS", "4")))
+
+# Build a requests session whose connection pool can serve every fetch worker at once
+def make_session(pool_size: int = TRANSCRIPT_FETCH_WORKERS) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# SQLite-backed store of parsed transcripts keyed by source URL
+class TranscriptStore(SqliteStore):
+    def __init__(self, path: str, workers: int = TRANSCRIPT_FETCH_WORKERS):
+        self.workers = workers
+        self._session = None
+        super().__init__(path, """
+            CREATE TABLE IF NOT EXISTS transcripts (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+        """)
+
+    # Return the stored transcript for a URL, or None if it has never been fetched or was parsed by an older extractor
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM transcripts WHERE url = ?", (url,)).fetchone()
+        data = json.loads(row[0]) if row else None
+        return data if data is not None and data.get("extractor") == EXTRACTOR_VERSION else None
+
+    # Return fetch metadata (content hash and timestamp) for a stored URL
+    def info(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash, fetched_at FROM transcripts WHERE url = ?", (url,)).fetchone()
+        return {"url": url, "content_hash": row[0], "fetched_at": row[1]} if row else None
+
+    # Parse raw article HTML and persist the extracted sections; also used to seed the store from saved pages
+    def put_html(self, url: str, html: str) -> Optional[Dict]:
+        data = parse_transcript_html(html, url)
+        if data is None:
+            return None
+
+        content_hash = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts (url, content_hash, fetched_at, data) VALUES (?, ?, ?, ?)",
+                (url, content_hash, time.time(), json.dumps(data, ensure_ascii=False))
+            )
+            self._conn.commit()
+        return data
+
+    # Download, parse and store a single transcript
+    def _fetch(self, url: str) -> Optional[Dict]:
+        try:
+            return self.put_html(url, fetch_transcript_html(url, self._get_session()))
+        except Exception as e:
+            print(f"[ERROR] Failed to scrape {url}: {e}")
+            return None
+
+    def _get_session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                self._session = make_session(self.workers)
+            return self._session
+
+    # Return transcripts in URL order, fetching only the ones not yet stored (all of them when refresh is set)
+    def fetch_all(self, urls: List[str], refresh: bool = False) -> List[Optional[Dict]]:
+        results = {url: None if refresh else self.get(url) for url in urls}
+        missing = [url for url, data in results.items() if data is None]
+
+        if missing:
+            print(f"[LOG] Fetching {len(missing)} transcript(s) with {min(self.workers, len(missing))} workers")
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(missing)), thread_name_prefix="scrape") as pool:
+                for url, data in zip(missing, pool.map(self._fetch, missing)):
+                    results[url] = data
+
+        return [results[url] for url in urls]
@@ -0,0 +1,156 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app.analyze import analyze_labeled_sections, configure_llm_pool, CACHE_DIR, OLLAMA_MODEL, OLLAMA_NUM_PARALLEL
+from app.progress import progress_registry
+from app.routing import parse_stage_models
+from app.transcript_store import TranscriptStore
+
+# Read manifest rows (company, quarter, source) from a CSV file with a header row or from JSON Lines
+def read_manifest(path):
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    entries = []
+    for row in rows:
+        source = (row.get("source") or row.get("url") or "").strip()
+        if not source:
+            print(f"[WARN] Skipping manifest row without a source: {row}")
+            continue
+        entries.append({
+            "company": (row.get("company") or "").strip() or "UNKNOWN",
+            "quarter": (row.get("quarter") or "").strip() or None,
+            "source": source,
+        })
+    return entries
+
+# Identity of a manifest entry for resume purposes; a different model (or stage routing) is different work
+def entry_key(entry, model, models=None):
+    return "|".join([entry["company"], entry["quarter"] or "", entry["source"], model, *(f"{k}={v}" for k, v in sorted((models or {}).items()))])
+
+# Load successfully completed entries from the checkpoint written by an earlier (possibly crashed) run
+def load_checkpoint(path):
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-write can leave a truncated last line
+                continue
+            if "error" not in record:
+                done[record["key"]] = record
+    return done
+
+# Resolve a source to a parsed transcript: local HTML files are ingested once, URLs go through the store
+def load_transcript(store, source):
+    if os.path.exists(source):
+        transcript = store.get(source)
+        if transcript is None:
+            with open(source, "r", encoding="utf-8") as f:
+                transcript = store.put_html(source, f.read())
+        return transcript
+    return store.fetch_all([source])[0]
+
+# Scrape (or load) one transcript and run its full analysis
+def run_entry(store, entry, model, tracker, models=None):
+    started = time.time()
+    transcript = load_transcript(store, entry["source"])
+    if transcript is None:
+        raise RuntimeError(f"Could not load transcript from {entry['source']}")
+
+    quarter = entry["quarter"] or transcript.get("quarter", "Unknown")
+    if quarter == "Unknown":
+        raise RuntimeError(f"No quarter in manifest and none detected from {entry['source']}")
+
+    analysis = analyze_labeled_sections(
+        prepared=transcript.get("prepared_remarks", ""),
+        qa=transcript.get("qa_section", ""),
+        company=entry["company"],
+        quarter=quarter,
+        model=model,
+        progress=tracker,
+        models=models
+    )
+    return {
+        "company": entry["company"],
+        "quarter": quarter,
+        "date": transcript.get("date"),
+        "source": entry["source"],
+        "model": model,
+        "models": analysis["models"],
+        "analysis": analysis,
+        "elapsed": round(time.time() - started, 3),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a manifest of earnings call transcripts under one concurrency budget.")
+    parser.add_argument("manifest", help="CSV (company,quarter,source) or JSON Lines manifest")
+    parser.add_argument("--output", default="batch_results.json", help="consolidated results file")
+    parser.add_argument("--model", default=OLLAMA_MODEL)
+    parser.add_argument("--models", default="", help="per-stage models, e.g. chunk_analysis=mistral,overall_summary=mixtral")
+    parser.add_argument("--concurrency", type=int, default=OLLAMA_NUM_PARALLEL, help="global limit on concurrent LLM calls")
+    parser.add_argument("--transcripts", type=int, default=None, help="transcripts in flight at once (default: --concurrency)")
+    args = parser.parse_args(argv)
+    models = parse_stage_models(args.models)
+
+    configure_llm_pool(args.concurrency)
+    checkpoint_path = args.output + ".partial.jsonl"
+    store = TranscriptStore(os.path.join(CACHE_DIR, "transcripts.sqlite3"))
+    tracker = progress_registry.get_or_create(f"batch:{os.path.basename(args.manifest)}")
+
+    entries = read_manifest(args.manifest)
+    done = load_checkpoint(checkpoint_path)
+    pending = [e for e in entries if entry_key(e, args.model, models) not in done]
+    print(f"[LOG] {len(entries)} manifest entries, {len(entries) - len(pending)} already complete, {len(pending)} to run")
+
+    write_lock = threading.Lock()
+    failures = 0
+    started = time.time()
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=args.transcripts or args.concurrency, thread_name_prefix="batch") as pool:
+        futures = {pool.submit(run_entry, store, entry, args.model, tracker, models): entry for entry in pending}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            entry = futures[future]
+            key = entry_key(entry, args.model, models)
+            try:
+                record = {"key": key, **future.result()}
+            except Exception as e:
+                failures += 1
+                print(f"[ERROR] {entry['company']} {entry['quarter'] or ''} {entry['source']}: {e}")
+                record = {"key": key, **entry, "model": args.model, "error": str(e)}
+            else:
+                done[key] = record
+
+            # Append and flush each result so a crash loses at most the transcripts still in flight
+            with write_lock:
+                checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+                checkpoint.flush()
+            print(f"[LOG] {completed}/{len(pending)} transcripts finished")
+
+    elapsed = time.time() - started
+    results = [done[entry_key(e, args.model, models)] for e in entries if entry_key(e, args.model, models) in done]
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"model": args.model, "models": models, "generated_at": time.time(), "results": results}, f, indent=2, ensure_ascii=False)
+
+    totals = tracker.snapshot()["totals"]
+    processed = len(pending) - failures
+    per_hour = processed / elapsed * 3600 if elapsed > 0 else 0.0
+    print(f"[DONE] Wrote {len(results)} results to {args.output} ({failures} failed)")
+    print(f"[DONE] {processed} transcripts in {elapsed:.1f}s -> {per_hour:.1f} transcripts/hour; "
+          f"{totals['llm_calls']} LLM calls, {totals['cache_hits']} cache hits")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1 @@
+# code/py_analysis/bench/__init__.py
@@ -0,0 +1,37 @@
+import re
+from typing import Dict
+
+from bs4 import BeautifulSoup
+
+# The BeautifulSoup/html.parser extraction the scraper used before app.extraction, kept as the benchmark
+# baseline. It collects <strong> tags nested inside <p> as blocks of their own, duplicating their text.
+def parse_transcript_html_bs4(html: str) -> Dict | None:
+    soup = BeautifulSoup(html, "html.parser")
+
+    content_div = soup.find("div", class_="article-content")
+    if not content_div:
+        for div in soup.find_all("div"):
+            classes = div.get("class", [])
+            if any("content" in c.lower() for c in classes):
+                content_div = div
+                break
+
+    if not content_div:
+        return None
+
+    text_blocks = [tag.get_text(strip=True) for tag in content_div.find_all(["p", "h2", "strong"]) if tag.get_text(strip=True)]
+    full_text = "\n".join(text_blocks)
+
+    prepared_header = re.search(r"(?i)Prepared Remarks:?", full_text)
+    qa_header = re.search(r"(?i)Questions & Answers:?", full_text)
+    end_header = re.search(r"(?i)Call Participants:?", full_text)
+
+    if not prepared_header or not qa_header:
+        return None
+
+    end_idx = end_header.start() if end_header else len(full_text)
+    return {
+        "operator_intro": full_text[:prepared_header.start()].strip(),
+        "prepared_remarks": full_text[prepared_header.end():qa_header.start()].strip(),
+        "qa_section": full_text[qa_header.end():end_idx].strip(),
+    }
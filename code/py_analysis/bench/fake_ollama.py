@@ -0,0 +1,235 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Small fixed vocabulary so generated text looks like prose and token counts are predictable
+WORDS = (
+    "demand revenue growth margin data center inference training customers supply guidance strong "
+    "confident cautious platform networking cloud enterprise sovereign export regulation quarter"
+).split()
+
+# Clients that retry or give up close keep-alive connections abruptly; that is expected, not an error
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+SENTIMENTS = ("Positive", "Positive", "Neutral", "Negative")
+TONES = ["confident", "optimistic", "cautious", "measured", "defensive", "enthusiastic"]
+CONCERNS = ["export regulation", "supply constraints", "gross margin pressure", "customer concentration", "power availability"]
+EMBED_DIMENSIONS = 256
+
+# "mistral=0.02,mixtral=0.2" -> {"mistral": 0.02, "mixtral": 0.2}
+def parse_model_latency(spec: str) -> dict:
+    pairs = (item.split("=", 1) for item in (spec or "").split(",") if "=" in item)
+    return {model.strip(): float(seconds) for model, seconds in pairs}
+
+# Deterministic stand-in for Ollama's /api/generate and /api/embed with configurable latency, speed and failures.
+# Latency can differ per model, and swap_latency is added whenever a request names a model other than the one
+# served last, like Ollama with a single loaded model.
+class FakeOllama:
+    def __init__(self, latency: float = 0.0, tokens_per_second: float = 0.0, failure_rate: float = 0.0,
+                 response_tokens: int = 64, host: str = "127.0.0.1", port: int = 0,
+                 model_latency: dict = None, swap_latency: float = 0.0):
+        self.latency = latency
+        self.model_latency = model_latency or {}
+        self.swap_latency = swap_latency
+        self.model_swaps = 0
+        self._loaded_model = None
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.response_tokens = response_tokens
+        self.requests = 0
+        self.failures = 0
+        self.generated_tokens = 0
+        self.embedded_texts = 0
+        self.max_prompt_tokens = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._server = QuietHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/generate"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "failures": self.failures, "generated_tokens": self.generated_tokens,
+                    "embedded_texts": self.embedded_texts,
+                    "model_swaps": self.model_swaps,
+                    "max_prompt_tokens": self.max_prompt_tokens}
+
+    # The same prompt always yields the same text; failures depend only on the prompt and its attempt number
+    # With format="json" the text is a signal object (sentiment, tone, themes, concerns, summary) split into tokens
+    def _tokens(self, prompt: str, format: str = None) -> list:
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        words = [rng.choice(WORDS) + " " for _ in range(self.response_tokens)]
+        if format != "json":
+            return words
+        signal = {
+            "sentiment": rng.choice(SENTIMENTS),
+            "tone": rng.sample(TONES, 2),
+            "themes": [" ".join(rng.sample(WORDS, 2)) for _ in range(3)],
+            "concerns": rng.sample(CONCERNS, rng.randint(0, 2)),
+            "summary": "".join(words).strip(),
+        }
+        return re.findall(r"\S+\s*", json.dumps(signal))
+
+    def _latency(self, model: str) -> float:
+        with self._lock:
+            swapped = self._loaded_model is not None and model != self._loaded_model
+            self._loaded_model = model
+            if swapped:
+                self.model_swaps += 1
+        return self.model_latency.get(model, self.latency) + (self.swap_latency if swapped else 0.0)
+
+    def _should_fail(self, prompt: str) -> bool:
+        with self._lock:
+            self.requests += 1
+            attempt = self._attempts.get(prompt, 0)
+            self._attempts[prompt] = attempt + 1
+            roll = int(hashlib.sha256(f"{attempt}:{prompt}".encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+            failed = roll < self.failure_rate
+            if failed:
+                self.failures += 1
+            return failed
+
+    # Bag-of-words vectors, so texts sharing most of their words embed close together as with a real model
+    @staticmethod
+    def _embedding(text: str) -> list:
+        vector = [0.0] * EMBED_DIMENSIONS
+        for word in re.findall(r"[a-z0-9']+", text.lower()):
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest()[:8], 16) % EMBED_DIMENSIONS] += 1.0
+        return vector
+
+    # Prompt size in tokens at roughly four characters each, as a stand-in for the model's tokenizer
+    @staticmethod
+    def _prompt_tokens(prompt: str) -> int:
+        return (len(prompt) + 3) // 4
+
+    def _stats_fields(self, prompt: str, tokens: list, elapsed: float) -> dict:
+        return {
+            "total_duration": int(elapsed * 1e9),
+            "prompt_eval_count": self._prompt_tokens(prompt),
+            "prompt_eval_duration": int(self.latency * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int(max(elapsed - self.latency, 0) * 1e9),
+        }
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path == "/api/embed":
+                    texts = body.get("input", [])
+                    texts = [texts] if isinstance(texts, str) else texts
+                    time.sleep(fake.latency)
+                    with fake._lock:
+                        fake.embedded_texts += len(texts)
+                    self._send_json(200, {"model": body.get("model"), "embeddings": [fake._embedding(t) for t in texts]})
+                    return
+                if self.path != "/api/generate":
+                    self._send_json(404, {"error": f"unknown endpoint {self.path}"})
+                    return
+
+                prompt = body.get("prompt", "")
+                started = time.monotonic()
+                time.sleep(fake._latency(body.get("model")))
+                if fake._should_fail(prompt):
+                    self._send_json(500, {"error": "injected failure"})
+                    return
+
+                tokens = fake._tokens(prompt, body.get("format"))
+                delay = 1.0 / fake.tokens_per_second if fake.tokens_per_second else 0.0
+                with fake._lock:
+                    fake.generated_tokens += len(tokens)
+                    fake.max_prompt_tokens = max(fake.max_prompt_tokens, fake._prompt_tokens(prompt))
+
+                if not body.get("stream", True):
+                    time.sleep(delay * len(tokens))
+                    self._send_json(200, {
+                        "model": body.get("model"), "response": "".join(tokens), "done": True,
+                        **fake._stats_fields(prompt, tokens, time.monotonic() - started)
+                    })
+                    return
+
+                # NDJSON stream: one event per token, then a final done event with stats
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write(event: dict):
+                    data = (json.dumps(event) + "\n").encode("utf-8")
+                    self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+
+                for token in tokens:
+                    time.sleep(delay)
+                    write({"model": body.get("model"), "response": token, "done": False})
+                write({"model": body.get("model"), "response": "", "done": True, **fake._stats_fields(prompt, tokens, time.monotonic() - started)})
+                self.wfile.write(b"0\r\n\r\n")
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a deterministic fake Ollama server.")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="0 means instant")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument("--model-latency", default="", help="per-model latency, e.g. mistral=0.02,mixtral=0.2")
+    parser.add_argument("--swap-latency", type=float, default=0.0, help="extra seconds when a request switches models")
+    args = parser.parse_args()
+
+    fake = FakeOllama(args.latency, args.tokens_per_second, args.failure_rate, args.response_tokens, port=args.port,
+                      model_latency=parse_model_latency(args.model_latency), swap_latency=args.swap_latency)
+    print(f"[STARTUP] Fake Ollama listening at {fake.url}")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
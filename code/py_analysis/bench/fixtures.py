@@ -0,0 +1,70 @@
+import os
+import random
+from typing import List
+
+# Speakers for synthetic calls: (name, title); the first entry is the conference operator
+SPEAKERS = [
+    ("Operator", None),
+    ("Colette Kress", "Chief Financial Officer"),
+    ("Jensen Huang", "President and Chief Executive Officer"),
+    ("Stewart Stecker", "Investor Relations"),
+]
+ANALYSTS = [("Vivek Arya", "Bank of America"), ("Joe Moore", "Morgan Stanley"), ("Timothy Arcuri", "UBS"), ("C.J. Muse", "Cantor Fitzgerald")]
+
+PHRASES = [
+    "data center revenue grew sequentially", "inference demand remains strong", "gross margin was in line with guidance",
+    "supply chain is ramping", "sovereign AI customers are building infrastructure", "networking revenue more than doubled",
+    "we remain confident in the outlook", "export regulation created headwinds in China", "enterprise adoption is broadening",
+    "cloud providers account for roughly half of revenue", "we expect growth to continue next quarter",
+    "visibility into demand extends into next year", "the platform ecosystem keeps expanding", "costs rose with the new architecture",
+]
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(rng.choice(PHRASES).capitalize() + "." for _ in range(sentences))
+
+def _turn(rng: random.Random, name: str, title: str | None, paragraphs: int) -> List[str]:
+    header = f"<p><strong>{name}</strong> -- <em>{title}</em></p>" if title else f"<p><strong>{name}</strong></p>"
+    return [header] + [f"<p>{_paragraph(rng, rng.randint(3, 7))}</p>" for _ in range(paragraphs)]
+
+# A Motley Fool-shaped transcript page; the same seed always produces the same bytes
+def synthetic_transcript_html(company: str, quarter: str, turns: int = 40, seed: int = 0) -> str:
+    rng = random.Random(f"{seed}:{company}:{quarter}")
+    operator, executives = SPEAKERS[0], SPEAKERS[1:]
+
+    body = [f"<h2>{company} ({company[:4].upper()}) {quarter} Earnings Call</h2>", "<h2>Prepared Remarks:</h2>"]
+    body += _turn(rng, *operator, 1)
+    for i in range(turns // 3):
+        body += _turn(rng, *executives[i % len(executives)], rng.randint(2, 5))
+
+    body.append("<h2>Questions &amp; Answers:</h2>")
+    for _ in range(turns - turns // 3):
+        analyst = rng.choice(ANALYSTS)
+        body += _turn(rng, *operator, 1)
+        body += _turn(rng, analyst[0], f"Analyst -- {analyst[1]}", 1)
+        body += _turn(rng, *rng.choice(executives[:2]), rng.randint(1, 4))
+
+    body.append("<h2>Call Participants:</h2>")
+    body += [f"<p>{name} -- {title}</p>" for name, title in SPEAKERS[1:] + ANALYSTS]
+
+    return (
+        "<!DOCTYPE html><html><head><title>Earnings Call Transcript</title></head><body>"
+        "<header><nav><a href='/'>Home</a></nav></header>"
+        f"<div class=\"article-body\"><div class=\"article-content\">{''.join(body)}</div></div>"
+        "<footer><p>Copyright</p></footer></body></html>"
+    )
+
+# Write synthetic pages for the last n quarters in the same directory layout `wget --force-directories` uses
+def write_synthetic_site(root: str, company: str = "NVIDIA", quarters: int = 4, turns: int = 40, seed: int = 0) -> List[str]:
+    paths = []
+    for i in range(quarters):
+        q, fiscal_year = 4 - i % 4, 2025 - i // 4
+        quarter = f"Q{q} {fiscal_year}"
+        month = 2 + 3 * (q % 4)
+        slug = f"{company.lower()}-{company[:4].lower()}-q{q}-{fiscal_year}-earnings-call-transcript"
+        rel = os.path.join("earnings", "call-transcripts", str(fiscal_year if q == 4 else fiscal_year - 1), f"{month:02d}", "25", slug, "index.html")
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(synthetic_transcript_html(company, quarter, turns, seed))
+        paths.append(rel)
+    return paths
@@ -0,0 +1,448 @@
+import argparse
+import contextlib
+import functools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.baseline_parser import parse_transcript_html_bs4
+from bench.fake_ollama import FakeOllama, parse_model_latency
+from bench.fixtures import write_synthetic_site
+
+# Serve saved pages from a directory so the scraper fetches them over HTTP exactly as it would from fool.com
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def start_fixture_server(root: str) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=root))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# Map every saved page under root to the URL it is served at; index.html pages map to their directory
+def fixture_urls(root: str, base_url: str) -> list:
+    urls = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith((".html", ".htm")):
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, "/")
+            urls.append(f"{base_url}/{rel[:-len('index.html')] if filename == 'index.html' else rel}")
+    return sorted(urls)
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+    return {
+        "min": round(ordered[0], 4),
+        "p50": round(pick(0.5), 4),
+        "p95": round(pick(0.95), 4),
+        "max": round(ordered[-1], 4),
+        "mean": round(statistics.fmean(ordered), 4),
+    }
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Scrape every fixture page through the real HTTP path, then time parsing alone on each extraction backend
+# against the original BeautifulSoup path
+def bench_scrape(urls: list, repeat: int) -> tuple:
+    from app.extraction import available_backends, extract_transcript, resolve_backend
+    from app.fool_scraper import fetch_transcript_html, scrape_transcript_from_url
+
+    transcripts, scrape_times = [], []
+    parsers = {name: (lambda html, name=name: extract_transcript(html, name)[0]) for name in available_backends()}
+    parsers["bs4_baseline"] = parse_transcript_html_bs4
+    parse_times = {name: [] for name in parsers}
+    chars = {name: 0 for name in parsers}
+
+    for url in urls:
+        started = time.perf_counter()
+        transcript = scrape_transcript_from_url(url)
+        scrape_times.append(time.perf_counter() - started)
+        if transcript is None:
+            raise RuntimeError(f"Fixture did not parse: {url}")
+        transcripts.append(transcript)
+
+        html = fetch_transcript_html(url)
+        for name, parse in parsers.items():
+            for _ in range(repeat):
+                started = time.perf_counter()
+                sections = parse(html)
+                parse_times[name].append(time.perf_counter() - started)
+            chars[name] += len(sections["prepared_remarks"]) + len(sections["qa_section"])
+
+    return transcripts, {
+        "pages": len(urls),
+        "backend": resolve_backend(),
+        "scrape_seconds": percentiles(scrape_times),
+        "parse_seconds": {name: percentiles(times) for name, times in parse_times.items()},
+        # The baseline's extra characters are mostly <strong> speaker names it emits twice
+        "section_chars": chars,
+    }
+
+# Line breaks and nested block elements must separate words in every backend, while inline tags must not
+TEXT_BREAK_HTML = (
+    '<div class="article-content"><p>a<br>b</p><h2>c<div>d</div></h2>'
+    '<strong>e<br/>f</strong><p>g<em>h</em> <b>i</b></p><ul><li><p>j</p></li></ul></div>'
+)
+TEXT_BREAK_EXPECTED = ["a b", "c d", "e f", "gh i", "j"]
+
+def check_text_breaks() -> dict:
+    from app.extraction import BACKENDS, available_backends
+
+    results = {}
+    for name in available_backends():
+        blocks = BACKENDS[name](TEXT_BREAK_HTML)
+        results[name] = blocks == TEXT_BREAK_EXPECTED
+        if not results[name]:
+            print(f"[WARN] {name} extracted {blocks} instead of {TEXT_BREAK_EXPECTED}")
+    return results
+
+# Chunking and scoring are the CPU-bound steps in front of the LLM; time them in isolation
+def bench_chunking(transcripts: list, company: str, model: str, repeat: int) -> dict:
+    from app.analyze import OLLAMA_OPTIONS
+    from app.chunking import chunk_transcript
+    from app.scoring import get_scorer
+
+    scorer = get_scorer(company)
+    chunk_times, score_times, chunk_counts = [], [], []
+    for transcript in transcripts:
+        for section in ("prepared_remarks", "qa_section"):
+            for _ in range(repeat):
+                started = time.perf_counter()
+                chunks = chunk_transcript(transcript[section], model=model, options=OLLAMA_OPTIONS)
+                chunk_times.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                scorer.score_many(chunks)
+                score_times.append(time.perf_counter() - started)
+            chunk_counts.append(len(chunks))
+
+    return {
+        "sections": len(chunk_counts),
+        "chunks_per_section": percentiles(chunk_counts),
+        "chunk_seconds": percentiles(chunk_times),
+        "score_seconds": percentiles(score_times),
+    }
+
+# One pass of analyze_labeled_sections over every quarter, recording latency, LLM traffic and peak memory
+def bench_analysis(transcripts: list, company: str, model: str, fake: FakeOllama, label: str) -> dict:
+    from app.analyze import analyze_labeled_sections, response_cache
+    from app.progress import ProgressTracker
+
+    tracker = ProgressTracker(f"bench:{label}", company)
+    cache_before = response_cache.stats()
+    quarters = {}
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    for transcript in transcripts:
+        quarter = transcript["quarter"]
+        requests_before = fake.stats()["requests"]
+        quarter_started = time.perf_counter()
+        analysis = analyze_labeled_sections(
+            prepared=transcript["prepared_remarks"],
+            qa=transcript["qa_section"],
+            company=company,
+            quarter=quarter,
+            model=model,
+            progress=tracker
+        )
+        entry = tracker.snapshot()["quarters"].get(quarter, {})
+        quarters[quarter] = {
+            "seconds": round(time.perf_counter() - quarter_started, 4),
+            "chunks": entry.get("chunks_total", 0),
+            "llm_calls": entry.get("llm_calls", 0),
+            "cache_hits": entry.get("cache_hits", 0),
+            "ollama_requests": fake.stats()["requests"] - requests_before,
+            "stages_recomputed": len(analysis["stages"]["recomputed"]),
+            "stages_reused": analysis["stages"]["reused"],
+            "selection": analysis.get("selection"),
+        }
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    cache_after = response_cache.stats()
+    hits = sum(q["cache_hits"] for q in quarters.values())
+    calls = sum(q["llm_calls"] for q in quarters.values())
+    return {
+        "seconds": round(elapsed, 4),
+        "quarters": quarters,
+        "llm_calls": calls,
+        "cache_hits": hits,
+        "cache_hit_rate": round(hits / (hits + calls), 4) if hits + calls else None,
+        "cache_entries_added": cache_after["entries"] - cache_before["entries"],
+        "peak_memory_mb": round(peak / 1e6, 2),
+        "max_prompt_tokens": fake.stats()["max_prompt_tokens"],
+    }
+
+# Cold analysis of every quarter under each stage-routing configuration, quarters running concurrently as the server
+# runs them. Each configuration gets an empty response cache and stage store so its wall-clock is comparable.
+def bench_routing(transcripts: list, company: str, model: str, fake: FakeOllama, routes: list, workdir: str, concurrency: int) -> dict:
+    import app.analyze as analyze
+    from app.cache import ResponseCache
+    from app.pipeline import StageStore
+    from app.routing import parse_stage_models
+
+    results = {}
+    for i, spec in enumerate(["default"] + routes):
+        models = {} if spec == "default" else parse_stage_models(spec)
+        cache_dir = os.path.join(workdir, "cache", f"routing_{i}")
+        analyze.response_cache = ResponseCache(os.path.join(cache_dir, "llm_cache.sqlite3"))
+        analyze.stage_store = StageStore(os.path.join(cache_dir, "stages.sqlite3"))
+        before = fake.stats()
+        switches_before = analyze.model_gate.switches
+
+        def run_quarter(transcript):
+            quarter_started = time.perf_counter()
+            analysis = analyze.analyze_labeled_sections(
+                prepared=transcript["prepared_remarks"], qa=transcript["qa_section"],
+                company=company, quarter=transcript["quarter"], model=model, models=models
+            )
+            return analysis, round(time.perf_counter() - quarter_started, 4)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            analyses = list(pool.map(run_quarter, transcripts))
+        after = fake.stats()
+        results[spec] = {
+            "models": analyses[0][0]["models"] if analyses else None,
+            "seconds": round(time.perf_counter() - started, 4),
+            "quarter_seconds": {t["quarter"]: seconds for t, (_, seconds) in zip(transcripts, analyses)},
+            "ollama_requests": after["requests"] - before["requests"],
+            "model_swaps": after["model_swaps"] - before["model_swaps"],
+            "gate_switches": analyze.model_gate.switches - switches_before,
+        }
+    return results
+
+# Analyze every quarter again with a small SUMMARY_BATCH_TOKENS and record the largest set of responses put into one
+# summary or reduce prompt; however the responses are sized, it has to stay within summary_batch_budget
+def bench_summary_budget(transcripts: list, company: str, model: str, budget: int, workdir: str) -> dict:
+    import app.analyze as analyze
+    import app.summaries as summaries
+    from app.cache import ResponseCache
+    from app.chunking import approx_tokens
+    from app.pipeline import StageStore
+
+    largest, lock = [0], threading.Lock()
+
+    def measured(build):
+        def wrapper(responses, *args, **kwargs):
+            tokens = sum(approx_tokens(text, model) + summaries.RESPONSE_SEPARATOR_TOKENS for text in responses)
+            with lock:
+                largest[0] = max(largest[0], tokens)
+            return build(responses, *args, **kwargs)
+        return wrapper
+
+    originals = (analyze.summarize_responses_prompt, analyze.reduce_responses_prompt, summaries.SUMMARY_BATCH_TOKENS, analyze.response_cache, analyze.stage_store)
+    analyze.summarize_responses_prompt = measured(originals[0])
+    analyze.reduce_responses_prompt = measured(originals[1])
+    summaries.SUMMARY_BATCH_TOKENS = budget
+    analyze.response_cache = ResponseCache(os.path.join(workdir, "cache", "budget", "llm_cache.sqlite3"))
+    analyze.stage_store = StageStore(os.path.join(workdir, "cache", "budget", "stages.sqlite3"))
+    try:
+        for transcript in transcripts:
+            analyze.analyze_labeled_sections(
+                prepared=transcript["prepared_remarks"], qa=transcript["qa_section"],
+                company=company, quarter=transcript["quarter"], model=model
+            )
+    finally:
+        (analyze.summarize_responses_prompt, analyze.reduce_responses_prompt, summaries.SUMMARY_BATCH_TOKENS,
+         analyze.response_cache, analyze.stage_store) = originals
+
+    if largest[0] > budget:
+        print(f"[WARN] A summary prompt carried {largest[0]} response tokens, over the {budget}-token batch budget")
+    return {"budget": budget, "max_response_tokens": largest[0], "within_budget": largest[0] <= budget}
+
+# Drive /analyze/last-four through waitress with concurrent clients; the first wave runs cold on a fresh model key
+def bench_server(urls: list, model: str, clients: int, requests_per_client: int, threads: int, fake: FakeOllama) -> dict:
+    from waitress import create_server
+
+    import server
+
+    server.TRANSCRIPT_URLS = urls
+    httpd = create_server(server.app, host="127.0.0.1", port=0, threads=threads)
+    threading.Thread(target=httpd.run, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{httpd.effective_port}/analyze/last-four"
+
+    def client(_):
+        latencies, errors = [], 0
+        with requests.Session() as session:
+            for _ in range(requests_per_client):
+                started = time.perf_counter()
+                res = session.get(endpoint, params={"model": model}, timeout=600)
+                latencies.append(time.perf_counter() - started)
+                errors += res.status_code != 200
+        return latencies, errors
+
+    requests_before = fake.stats()["requests"]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - started
+
+    # A warm repeat of the same request must revalidate to 304 against the ETag of the previous body
+    with requests.Session() as session:
+        first = session.get(endpoint, params={"model": model}, timeout=600)
+        repeat = session.get(endpoint, params={"model": model}, headers={"If-None-Match": first.headers.get("ETag", "")}, timeout=600)
+    if repeat.status_code != 304:
+        print(f"[WARN] Repeat /analyze/last-four returned {repeat.status_code} instead of 304; the response body is not stable")
+    # The waitress loop runs on a daemon thread and goes away with the process; closing it mid-select only logs noise
+
+    latencies = [latency for client_latencies, _ in results for latency in client_latencies]
+    first_wave = [client_latencies[0] for client_latencies, _ in results if client_latencies]
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "seconds": round(elapsed, 4),
+        "requests_per_second": round(len(latencies) / elapsed, 3) if elapsed else None,
+        "latency_seconds": percentiles(latencies),
+        "first_request_seconds": percentiles(first_wave),
+        "ollama_requests": fake.stats()["requests"] - requests_before,
+        "repeat_status": repeat.status_code,
+    }
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline against a deterministic fake Ollama server.")
+    parser.add_argument("--html-dir", help="saved Motley Fool pages (wget --force-directories layout); default: synthetic fixtures")
+    parser.add_argument("--company", default="NVIDIA")
+    parser.add_argument("--model", default="bench-model")
+    parser.add_argument("--quarters", type=int, default=4, help="synthetic transcripts to generate")
+    parser.add_argument("--turns", type=int, default=40, help="speaker turns per synthetic transcript")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Ollama seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="fake Ollama generation speed (0 = instant)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of fake Ollama requests answered with HTTP 500")
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument("--stream", action="store_true", help="use the streaming generate path")
+    parser.add_argument("--html-backend", default="auto", help="HTML_BACKEND for the scrape path (auto, selectolax, lxml, html.parser)")
+    parser.add_argument("--parallel", type=int, default=4, help="OLLAMA_NUM_PARALLEL for the run")
+    parser.add_argument("--summary-reduce", default="hierarchical", help="SUMMARY_REDUCE for the run (hierarchical or flat)")
+    parser.add_argument("--fan-in", type=int, default=8, help="SUMMARY_FAN_IN for the run")
+    parser.add_argument("--summary-batch-tokens", type=int, default=0, help="SUMMARY_BATCH_TOKENS for the run (0 = model context)")
+    parser.add_argument("--budget-check-tokens", type=int, default=150, help="small SUMMARY_BATCH_TOKENS the summary budget check runs with (0 = skip)")
+    parser.add_argument("--model-latency", default="", help="fake Ollama latency per model, e.g. small=0.02,large=0.2")
+    parser.add_argument("--swap-latency", type=float, default=0.0, help="fake Ollama seconds added when a request switches models")
+    parser.add_argument("--route", action="append", default=[], help="stage routing to time, e.g. chunk_analysis=small,section_summary=small (repeatable)")
+    parser.add_argument("--max-loaded-models", type=int, default=1, help="OLLAMA_MAX_LOADED_MODELS for the model gate")
+    parser.add_argument("--dedup", action="store_true", help="enable CHUNK_DEDUP (embedding-based near-duplicate selection)")
+    parser.add_argument("--embed-backend", default="ollama", help="EMBED_BACKEND for --dedup (ollama or hashing)")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions for the parse/chunk/score timings")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent /analyze/last-four clients")
+    parser.add_argument("--requests-per-client", type=int, default=3)
+    parser.add_argument("--server-threads", type=int, default=8)
+    parser.add_argument("--skip-server", action="store_true")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    return parser
+
+# Run every benchmark section and return the results document
+def run(args) -> dict:
+
+    workdir = tempfile.mkdtemp(prefix="ecse-bench-")
+    html_dir = args.html_dir or os.path.join(workdir, "site")
+    if not args.html_dir:
+        write_synthetic_site(html_dir, args.company, args.quarters, args.turns)
+
+    fake = FakeOllama(args.latency, args.tokens_per_second, args.failure_rate, args.response_tokens,
+                      model_latency=parse_model_latency(args.model_latency), swap_latency=args.swap_latency).start()
+    fixtures = start_fixture_server(html_dir)
+
+    # The app reads its configuration at import time, so point it at the stubs before importing anything from it
+    os.environ.update({
+        "OLLAMA_URL": fake.url,
+        "OLLAMA_MODEL": args.model,
+        "OLLAMA_STREAM": "true" if args.stream else "false",
+        "OLLAMA_NUM_PARALLEL": str(args.parallel),
+        "HTML_BACKEND": args.html_backend,
+        "SUMMARY_REDUCE": args.summary_reduce,
+        "SUMMARY_FAN_IN": str(args.fan_in),
+        "SUMMARY_BATCH_TOKENS": str(args.summary_batch_tokens),
+        "CHUNK_DEDUP": "true" if args.dedup else "false",
+        "EMBED_BACKEND": args.embed_backend,
+        "OLLAMA_MAX_LOADED_MODELS": str(args.max_loaded_models),
+        "CACHE_DIR": os.path.join(workdir, "cache"),
+    })
+    os.environ.setdefault("OLLAMA_BACKOFF_BASE", "0.05")
+    os.environ.setdefault("OLLAMA_BACKOFF_MAX", "0.5")
+
+    import app.analyze as analyze
+    from app.pipeline import StageStore
+
+    urls = fixture_urls(html_dir, f"http://127.0.0.1:{fixtures.server_address[1]}")
+    if not urls:
+        raise SystemExit(f"[ERROR] No .html pages found under {html_dir}")
+    print(f"[LOG] Benchmarking {len(urls)} transcripts from {html_dir}")
+
+    transcripts, scrape = bench_scrape(urls, args.repeat)
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "config": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "scrape": scrape,
+        "text_breaks": check_text_breaks(),
+        "chunking": bench_chunking(transcripts, args.company, args.model, args.repeat),
+        "analysis": {},
+    }
+
+    # Cold: empty cache and stage store. Stage reuse: nothing changed, so every node is clean.
+    # Cache warm: a fresh stage store forces every node to recompute, so each LLM call becomes a cache hit.
+    results["analysis"]["cold"] = bench_analysis(transcripts, args.company, args.model, fake, "cold")
+    results["analysis"]["stage_reuse"] = bench_analysis(transcripts, args.company, args.model, fake, "stage_reuse")
+    analyze.stage_store = StageStore(os.path.join(workdir, "cache", "stages_warm.sqlite3"))
+    results["analysis"]["cache_warm"] = bench_analysis(transcripts, args.company, args.model, fake, "cache_warm")
+
+    if args.budget_check_tokens and args.summary_reduce == "hierarchical":
+        results["summary_budget"] = bench_summary_budget(transcripts, args.company, args.model, args.budget_check_tokens, workdir)
+
+    if args.route:
+        results["routing"] = bench_routing(transcripts, args.company, args.model, fake, args.route, workdir, len(transcripts))
+
+    if not args.skip_server:
+        results["server"] = bench_server(urls, f"{args.model}-http", args.clients, args.requests_per_client, args.server_threads, fake)
+
+    results["fake_ollama"] = fake.stats()
+    fixtures.shutdown()
+    fake.stop()
+    return results
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # App logging goes to stderr so stdout carries only the JSON document
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"[DONE] Wrote benchmark results to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,38 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-from app.analyze import analyze_labeled_sections, compare_tone, _cache_path
-from app.fool_scraper import scrape_transcript_from_url
+from app.analyze import analyze_labeled_sections, compare_tone_pairs, get_chunk_details, response_cache, routes_for, signal_store, summary_store, CACHE_DIR, OLLAMA_MODEL
+from app.transcript_store import TranscriptStore
+from app.jobs import JobQueue, FAILED
+from app.metrics import CACHE_BYTES, CACHE_ENTRIES, HTTP_SECONDS, registry as metrics_registry, span
+from app.progress import ProgressTracker, progress_registry
+from app.routing import ModelSpecError, parse_stage_models
+from app.signals import SECTIONS, TERM_KINDS
+from app.summaries import PairSpecError, select_pairs
+import gzip
+import hashlib
 import json
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlencode
 
 # Initialize Flask app and enable CORS for development
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:3000"])
 
+# Per-quarter result fields selectable with ?fields=; ?view=lean selects all but the full transcript
+RESULT_FIELDS = ("summary", "management_sentiment", "qa_sentiment", "strategic_focuses", "transcript")
+LEAN_FIELDS = RESULT_FIELDS[:-1]
+# Analysis entries beside `result` that trimmed views leave out unless listed in ?fields=
+OPTIONAL_ANALYSIS_FIELDS = ("signals",)
+CHUNK_FIELDS = ("index", "section", "score", "reason", "summary", "represented_by", "chunk")
+PAGE_LIMIT_MAX = 500
+# JSON bodies smaller than this are sent uncompressed
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+# Quarters of one request analyzed at once; their LLM calls share the pool and the model gate, so stages routed to
+# the same model run together across quarters
+QUARTER_CONCURRENCY = max(1, int(os.getenv("QUARTER_CONCURRENCY", "4")))
+
 # Static list of earnings call transcript URLs (Motley Fool)
 TRANSCRIPT_URLS = [
     "https://www.fool.com/earnings/call-transcripts/2025/02/26/nvidia-nvda-q4-2025-earnings-call-transcript/",
@@ -17,19 +41,39 @@ TRANSCRIPT_URLS = [
     "https://www.fool.com/earnings/call-transcripts/2024/05/29/nvidia-nvda-q1-2025-earnings-call-transcript/",
 ]
 
-# Run analysis on the latest four transcripts and package results
-def run_analyze_last_four(company="NVIDIA", provider="ollama"):
-    raw_transcripts = [scrape_transcript_from_url(url) for url in TRANSCRIPT_URLS]
-    results = []
-    for t in raw_transcripts:
-        quarter = t.get("quarter", "QX")
-        analysis = analyze_labeled_sections(
+# Parsed transcripts persist across requests; only URLs never seen before hit the network
+transcript_store = TranscriptStore(os.path.join(CACHE_DIR, "transcripts.sqlite3"))
+
+# Load the configured transcripts from the store, fetching any missing ones concurrently
+def load_transcripts(quarters=None):
+    transcripts = [t for t in transcript_store.fetch_all(TRANSCRIPT_URLS) if t is not None]
+    if quarters:
+        wanted = {q.upper() for q in quarters}
+        transcripts = [t for t in transcripts if t["quarter"].upper() in wanted]
+    return transcripts
+
+# Run analysis on the latest four transcripts (concurrently, up to QUARTER_CONCURRENCY) and package results in order
+def run_analyze_last_four(company="NVIDIA", provider="ollama", model=None, quarters=None, progress=None, models=None):
+    with span("load_transcripts", progress):
+        raw_transcripts = load_transcripts(quarters)
+
+    def analyze(t):
+        return analyze_labeled_sections(
             prepared=t.get("prepared_remarks", ""),
             qa=t.get("qa_section", ""),
             company=company,
-            quarter=quarter,
-            provider=provider
+            quarter=t.get("quarter", "QX"),
+            provider=provider,
+            model=model,
+            progress=progress,
+            models=models
         )
+
+    with ThreadPoolExecutor(max_workers=min(QUARTER_CONCURRENCY, max(1, len(raw_transcripts))), thread_name_prefix="quarter") as pool:
+        analyses = list(pool.map(analyze, raw_transcripts))
+
+    results = []
+    for t, analysis in zip(raw_transcripts, analyses):
         results.append({
             "quarter": t["quarter"],
             "date": t["date"],
@@ -43,90 +87,398 @@ def run_analyze_last_four(company="NVIDIA", provider="ollama"):
         })
     return results
 
-# Compute tone shift between adjacent quarters using cached summaries
-def run_tone_shift(company="NVIDIA", provider="ollama"):
-    def parse_quarter(quarter_str):
-        q, year = quarter_str.upper().split()
-        return int(year), int(q[1])
+# Quarter labels of the configured transcripts already in the store (no network)
+def stored_quarters():
+    return [t["quarter"] for t in (transcript_store.get(url) for url in TRANSCRIPT_URLS) if t is not None]
+
+# Compare tone between quarter pairs (adjacent by default) from the in-memory summaries, concurrently
+def run_tone_shift(company="NVIDIA", provider="ollama", model=None, quarters=None, progress=None, pairs=None, models=None):
+    summary_model = routes_for(model, models)["overall_summary"][0]
+    labels = list(quarters or []) or summary_store.quarters(company, summary_model) or stored_quarters()
+    with span("tone_shift", progress):
+        comparisons = compare_tone_pairs(company, select_pairs(labels, pairs), model, progress, models=models)
+
+    return {
+        "company": company,
+        "signal": "tone_shift",
+        "pairs": pairs or "adjacent",
+        "comparisons": comparisons
+    }
+
+# Background job body: full per-quarter analysis, followed by tone shift when the job asks for it, reported on the
+# job's tracker
+def run_analysis_job(job):
+    params = job.params
+    company, provider, model, quarters, models = params["company"], params["provider"], params["model"], params["quarters"], params["models"]
+    tracker = progress_registry.get_or_create(job.id, company)
+    try:
+        results = run_analyze_last_four(company, provider, model, quarters, tracker, models)
+        # Tone shift reads the summaries the analysis just produced; nothing is re-scraped or re-analyzed
+        result = {"company": company, "results": results}
+        if params["tone_shift"]:
+            analyzed = [r["quarter"] for r in results]
+            result["tone_shift"] = run_tone_shift(company, provider, model, analyzed, tracker, params["pairs"], models)
+    except Exception as e:
+        tracker.finish("failed", str(e))
+        raise
+    tracker.finish("done")
+    return result
+
+job_queue = JobQueue(run_analysis_job)
+
+class ParamError(ValueError):
+    pass
 
-    scraped = [scrape_transcript_from_url(url) for url in TRANSCRIPT_URLS]
-    scraped = [s for s in scraped if s is not None]
-    scraped = sorted(scraped, key=lambda d: parse_quarter(d["quarter"]))
-    comparisons = []
+# Normalize job parameters from query args or a JSON body so identical requests coalesce. `tone_shift` is the
+# route's default for whether the job also compares tone; it is part of the key, so the two kinds never merge.
+def parse_job_params(source, tone_shift=True):
+    quarters = source.get("quarters") or []
+    if isinstance(quarters, str):
+        quarters = quarters.split(",")
+    if not isinstance(quarters, list) or not all(isinstance(q, str) for q in quarters):
+        raise ParamError("quarters must be a comma-separated string or a list of strings")
+    for field in ("company", "provider", "model"):
+        if not isinstance(source.get(field) or "", str):
+            raise ParamError(f"{field} must be a string")
+    tone_shift = parse_flag(source.get("tone_shift"), tone_shift)
+    return {
+        "company": source.get("company", "NVIDIA"),
+        "provider": source.get("provider", "ollama"),
+        "model": source.get("model") or OLLAMA_MODEL,
+        "quarters": sorted({q.strip().upper() for q in quarters if q.strip()}),
+        "tone_shift": tone_shift,
+        # Pairs only matter when tone is compared; without it they would just split otherwise identical jobs
+        "pairs": parse_pairs_param(source) if tone_shift else "adjacent",
+        "models": parse_stage_models(source.get("models"))
+    }
 
-    for i in range(len(scraped) - 1):
-        q1 = scraped[i]["quarter"]
-        q2 = scraped[i + 1]["quarter"]
+# Boolean from a JSON value or a query string such as "1", "true" or "no"; missing means the default
+def parse_flag(value, default):
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("1", "true", "yes", "0", "false", "no"):
+        return value.lower() in ("1", "true", "yes")
+    raise ParamError(f"Invalid flag {value!r}; expected true or false")
 
-        path1 = _cache_path("", company, q1, None, is_summary=1)
-        path2 = _cache_path("", company, q2, None, is_summary=1)
+# Validate the tone-shift pair selection up front so a bad spec is a 400, not a failed job
+def parse_pairs_param(source):
+    pairs = source.get("pairs") or "adjacent"
+    if not isinstance(pairs, str):
+        raise PairSpecError("pairs must be a string: adjacent, all, or e.g. 'Q1 2025:Q3 2025,Q2 2025:Q4 2025'")
+    pairs = pairs.strip()
+    select_pairs([], pairs)
+    return pairs
 
-        if not path1.exists() or not path2.exists():
-            print(f"[WARN] Missing summary cache for {q1} or {q2}, skipping...")
-            continue
+@app.errorhandler(PairSpecError)
+@app.errorhandler(ModelSpecError)
+@app.errorhandler(ParamError)
+def bad_spec(error):
+    return jsonify({"error": str(error)}), 400
 
-        with open(path1, "r", encoding="utf-8") as f1:
-            summary1 = json.load(f1)["content"]
+# Submit (or attach to) a job and block until it finishes; used by the legacy GET routes
+def run_job_blocking(params):
+    job, _ = job_queue.submit(params)
+    job.wait()
+    if job.status == FAILED:
+        raise RuntimeError(job.error)
+    return job
 
-        with open(path2, "r", encoding="utf-8") as f2:
-            summary2 = json.load(f2)["content"]
+# ?timings=1 asks for the per-span time breakdown alongside a response
+def wants_timings():
+    return request.args.get("timings", "").lower() in ("1", "true", "yes")
 
-        result = compare_tone(summary1, summary2, company, q1, q2)
+# Time breakdown of the job that produced a result (coalesced requests share their job's breakdown)
+def job_timings(job):
+    tracker = progress_registry.get(job.id)
+    return tracker.timing_breakdown() if tracker is not None else None
 
-        comparisons.append({
-            "from": q1,
-            "to": q2,
-            "result": result
+# Result fields requested via ?fields=a,b or ?view=lean; None means the full legacy payload
+def requested_fields():
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip() in RESULT_FIELDS + OPTIONAL_ANALYSIS_FIELDS]
+    if fields:
+        return fields
+    if request.args.get("view", "").lower() == "lean":
+        return list(LEAN_FIELDS)
+    return None
+
+# Trim per-quarter results to the selected fields and point at the paginated endpoints for the rest
+def shape_results(results, fields):
+    if fields is None:
+        return results
+    shaped = []
+    for item in results:
+        analysis = item["analysis"]
+        shaped.append({
+            "quarter": item["quarter"],
+            "date": item["date"],
+            "analysis": {
+                **{k: v for k, v in analysis.items() if k not in ("result", "stages", *OPTIONAL_ANALYSIS_FIELDS) or k in fields},
+                "result": {field: analysis["result"][field] for field in fields if field in analysis["result"]},
+            },
+            "links": {
+                "transcript": f"/transcripts/{quote(item['quarter'])}",
+                "chunks": f"/chunks/{quote(item['quarter'])}?{urlencode({'company': analysis['company']})}",
+            },
         })
+    return shaped
 
+# Offset/limit pagination over a list, with the offset of the next page (None on the last one)
+def paginate(items):
+    offset = max(0, request.args.get("offset", 0, type=int))
+    limit = min(max(1, request.args.get("limit", 50, type=int)), PAGE_LIMIT_MAX)
+    end = offset + limit
     return {
-        "company": company,
-        "signal": "tone_shift",
-        "comparisons": comparisons
+        "offset": offset,
+        "limit": limit,
+        "total": len(items),
+        "next_offset": end if end < len(items) else None,
+        "items": items[offset:end],
     }
 
+# Time every request by route for /metrics; the route pattern keeps label cardinality bounded
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        HTTP_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method, status=response.status_code)
+    return response
+
+# Conditional GET and compression for JSON bodies: a strong ETag over the uncompressed body turns repeat
+# loads into 304s, and gzip applies when the client accepts it. Streams (SSE) are left untouched.
+@app.after_request
+def conditional_and_compressed(response):
+    if request.method != "GET" or response.status_code != 200 or response.is_streamed or response.mimetype != "application/json":
+        return response
+
+    body = response.get_data()
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    compress = "gzip" in request.headers.get("Accept-Encoding", "").lower() and len(body) >= GZIP_MIN_BYTES
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = "no-cache"
+
+    # Either representation's tag matches, since both are derived from the same body
+    if request.if_none_match.contains(etag) or request.if_none_match.contains(f"{etag}-gz"):
+        response.status_code = 304
+        response.set_data(b"")
+        response.headers.pop("Content-Type", None)
+        response.headers.pop("Content-Length", None)
+        response.set_etag(f"{etag}-gz" if compress else etag)
+        return response
+
+    if compress:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers["Content-Encoding"] = "gzip"
+    response.set_etag(f"{etag}-gz" if compress else etag)
+    return response
+
 # Route: root - returns both last-four analysis and tone shift
 @app.route("/", methods=["GET"])
 def analyze_all():
     print("[LOG] / route called")
-    company = request.args.get("company", "NVIDIA")
-    provider = request.args.get("provider", "ollama")
-    last_four = run_analyze_last_four(company, provider)
-    tone_shift = run_tone_shift(company, provider)
-    return jsonify({
-        "results": last_four,
-        "tone_shift": tone_shift
-    })
+    job = run_job_blocking(parse_job_params(request.args))
+    response = {
+        "results": shape_results(job.result["results"], requested_fields()),
+        "tone_shift": job.result["tone_shift"]
+    }
+    if wants_timings():
+        response["timings"] = job_timings(job)
+    return jsonify(response)
 
 # Route: /analyze/last-four - returns structured analysis for each quarter
 @app.route("/analyze/last-four", methods=["GET"])
 def analyze_last_four():
     print('[LOG] /analyze/last-four called')
-    company = request.args.get("company", "NVIDIA")
-    provider = request.args.get("provider", "ollama")
-    last_four = run_analyze_last_four(company, provider)
-    return jsonify({
-        "company": company,
-        "results": last_four
-    })
+    job = run_job_blocking(parse_job_params(request.args, tone_shift=False))
+    response = {
+        "company": job.result["company"],
+        "results": shape_results(job.result["results"], requested_fields())
+    }
+    if wants_timings():
+        response["timings"] = job_timings(job)
+    return jsonify(response)
 
-# Route: /analyze/tone-shift - returns comparison summaries
+# Route: /analyze/tone-shift - compares tone across analyzed quarters; ?pairs=adjacent (default), all, or "Q1 2025:Q3 2025,..."
 @app.route("/analyze/tone-shift", methods=["GET"])
 def analyze_tone_shift():
     company = request.args.get("company", "NVIDIA")
     provider = request.args.get("provider", "ollama")
-    return jsonify(run_tone_shift(company, provider))
+    model = request.args.get("model")
+    quarters = [q.strip().upper() for q in request.args.get("quarters", "").split(",") if q.strip()]
+    pairs = parse_pairs_param(request.args)
+    models = parse_stage_models(request.args.get("models"))
+    if not wants_timings():
+        return jsonify(run_tone_shift(company, provider, model, quarters, pairs=pairs, models=models))
+    tracker = ProgressTracker("tone-shift", company)
+    return jsonify({**run_tone_shift(company, provider, model, quarters, tracker, pairs, models), "timings": tracker.timing_breakdown()})
+
+# Route: POST /jobs - enqueue an analysis (company, quarters, model, per-stage models) and return its job ID
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    params = parse_job_params(request.get_json(silent=True) or request.form)
+    job, coalesced = job_queue.submit(params)
+    return jsonify({**job.to_dict(), "coalesced": coalesced}), 202, {"Location": f"/jobs/{job.id}"}
+
+# Route: GET /jobs - lists known jobs and their status
+@app.route("/jobs", methods=["GET"])
+def list_jobs():
+    return jsonify({"jobs": job_queue.list_jobs()})
+
+# Route: GET /jobs/<job_id> - returns job status; ?wait=N long-polls up to N seconds for completion
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    try:
+        wait = min(max(0.0, float(request.args.get("wait") or 0)), 60)
+    except ValueError:
+        raise ParamError(f"Invalid wait {request.args.get('wait')!r}; expected seconds")
+    if wait > 0:
+        job.wait(wait)
+    return jsonify(job.to_dict())
+
+# Route: GET /jobs/<job_id>/result - returns the job result once finished (202 while pending)
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if job.status == FAILED:
+        return jsonify(job.to_dict()), 500
+    if not job.finished:
+        return jsonify(job.to_dict()), 202
+    result = {**job.result, "results": shape_results(job.result["results"], requested_fields())}
+    if wants_timings():
+        result["timings"] = job_timings(job)
+    return jsonify(result)
+
+# Route: /transcripts/<quarter> - speaker turns of a stored transcript, paginated with ?offset=&limit=;
+# ?section=prepared|qa limits it to one section
+@app.route("/transcripts/<quarter>", methods=["GET"])
+def transcript_turns(quarter):
+    transcripts = load_transcripts([quarter])
+    if not transcripts:
+        return jsonify({"error": f"No transcript for {quarter}"}), 404
+    transcript = transcripts[0]
+
+    section = request.args.get("section", "all").lower()
+    turns = []
+    if section in ("all", "prepared"):
+        turns += [{"section": "prepared", **turn} for turn in transcript.get("prepared_turns", [])]
+    if section in ("all", "qa"):
+        turns += [{"section": "qa", **turn} for turn in transcript.get("qa_turns", [])]
+    return jsonify({"quarter": transcript["quarter"], "date": transcript["date"], "source": transcript["source"], **paginate(turns)})
+
+# Route: /chunks/<quarter> - per-chunk score, reason and analysis from the last run, paginated;
+# ?section=management_sentiment|qa_sentiment filters, ?fields= selects (chunk text is only sent when asked for)
+@app.route("/chunks/<quarter>", methods=["GET"])
+def chunk_details(quarter):
+    company = request.args.get("company", "NVIDIA")
+    details = get_chunk_details(company, quarter)
+    if not details:
+        return jsonify({"error": f"No analyzed chunks for {company} {quarter}"}), 404
+
+    section = request.args.get("section")
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip() in CHUNK_FIELDS] or [f for f in CHUNK_FIELDS if f != "chunk"]
+    items = [
+        {field: value for field, value in {"section": label, **item}.items() if field in fields}
+        for label, chunks in details.items() if section in (None, label)
+        for item in chunks
+    ]
+    return jsonify({"company": company, "quarter": quarter, **paginate(items)})
+
+# Route: /signals/trend - sentiment per quarter from the signal store (no LLM calls);
+# ?section=overall (default), management_sentiment, qa_sentiment or strategic_focuses
+@app.route("/signals/trend", methods=["GET"])
+def signal_trend():
+    company = request.args.get("company", "NVIDIA")
+    section = request.args.get("section", "overall")
+    if section not in SECTIONS:
+        return jsonify({"error": f"Unknown section {section!r}; expected one of {', '.join(SECTIONS)}"}), 400
+    with span("signal_query"):
+        trend = signal_store.trend(company, section)
+    return jsonify({"company": company, "section": section, "trend": trend})
+
+# Route: /signals/mentions?q=export regulation - quarters whose themes, concerns, tone or summaries mention a phrase;
+# ?kinds=theme,concern narrows the term match, ?text=0 skips the summary text
+@app.route("/signals/mentions", methods=["GET"])
+def signal_mentions():
+    company = request.args.get("company", "NVIDIA")
+    phrase = request.args.get("q", "").strip()
+    if not phrase:
+        return jsonify({"error": "Missing ?q= phrase"}), 400
+    kinds = tuple(k.strip() for k in request.args.get("kinds", "").split(",") if k.strip()) or TERM_KINDS
+    include_text = request.args.get("text", "1").lower() not in ("0", "false", "no")
+    with span("signal_query"):
+        quarters = signal_store.mentions(company, phrase, kinds, include_text)
+    return jsonify({"company": company, "q": phrase, "quarters": quarters})
+
+# Route: /signals/tone-shift - sentiment changes and added/dropped tone, themes and concerns between quarter pairs,
+# computed from the signal store; takes the same ?pairs= as /analyze/tone-shift
+@app.route("/signals/tone-shift", methods=["GET"])
+def signal_tone_shift():
+    company = request.args.get("company", "NVIDIA")
+    quarters = [q.strip().upper() for q in request.args.get("quarters", "").split(",") if q.strip()]
+    pairs = parse_pairs_param(request.args)
+    with span("signal_query"):
+        shifts = signal_store.tone_shift(company, select_pairs(quarters or signal_store.quarters(company), pairs))
+    return jsonify({"company": company, "signal": "tone_shift", "pairs": pairs, "comparisons": shifts})
 
-# Route: /progress - returns JSON indicating current backend progress state
+# Route: /progress - returns JSON with the most recent backend status line
 @app.route("/progress", methods=["GET"])
 def progress():
-    try:
-        with open("progress.json", "r", encoding="utf-8") as f:
-            return jsonify(json.load(f))
-    except FileNotFoundError:
-        return jsonify({"status": "Starting up...", "timestamp": time.time()})
-    except Exception as e:
-        return jsonify({"status": f"Error: {str(e)}", "timestamp": time.time()})
+    return jsonify(progress_registry.status)
+
+# Route: /progress/<job_id> - returns structured per-quarter progress for a job
+@app.route("/progress/<job_id>", methods=["GET"])
+def job_progress(job_id):
+    if job_queue.get(job_id) is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(progress_registry.get_or_create(job_id).snapshot())
+
+# Route: /progress/<job_id>/stream - Server-Sent Events stream of progress snapshots until the job finishes
+@app.route("/progress/<job_id>/stream", methods=["GET"])
+def job_progress_stream(job_id):
+    if job_queue.get(job_id) is None:
+        return jsonify({"error": "Unknown job"}), 404
+    tracker = progress_registry.get_or_create(job_id)
+
+    # The first event carries all streamed text so far; later ones only the text that changed since the last event
+    def events():
+        version = -1
+        while True:
+            latest = tracker.wait_for_update(version, timeout=15)
+            if latest == version and not tracker.finished:
+                yield ": keep-alive\n\n"
+                continue
+            snapshot = tracker.snapshot(since=version)
+            version = snapshot["version"]
+            yield f"data: {json.dumps(snapshot)}\n\n"
+            if tracker.finished:
+                break
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=headers)
+
+# Route: /cache/stats - returns response cache hit/miss counters and disk usage
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(response_cache.stats())
+
+# Route: /metrics - Prometheus text exposition of pipeline spans, cache traffic, Ollama stats and request timings
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    stats = response_cache.stats()
+    CACHE_ENTRIES.set(stats["entries"])
+    CACHE_BYTES.set(stats["bytes"])
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
 
 # Entry point: run Flask app with Waitress in production context
 if __name__ == "__main__":
@@ -134,4 +486,5 @@ if __name__ == "__main__":
     print("[STARTUP] Waitress serving on port 5000...")
     print("[STARTUP] Registered routes:")
     print(app.url_map)
-    serve(app, host="0.0.0.0", port=5000)
\ No newline at end of file
+    # Progress streams hold a thread each, so leave headroom beyond Waitress's default of 4
+    serve(app, host="0.0.0.0", port=5000, threads=int(os.getenv("WAITRESS_THREADS", "8")))
\ No newline at end of file